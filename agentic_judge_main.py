@@ -1,9 +1,29 @@
 import streamlit as st
-from groq import Groq
 import json
-from tools import evaluate_translation_with_reflection
-from tools import predict_translation_quality
-from tools import style_checker
+import time
+from concurrent.futures import ThreadPoolExecutor
+from startup import import_timer, record_timing, start_background_preload, startup_report
+# tools no longer imports comet/torch at load time; COMET is imported when it is first needed
+with import_timer("tools"):
+    from tools import evaluate_translation_with_reflection
+    from tools import evaluate_candidates_with_reflection
+    from tools import predict_translation_quality
+    from tools import style_checker
+    from tools import comet_batcher_stats
+    from tools import comet_worker_stats
+    from tools import count_llm_calls
+    from tools import speculation_stats
+    from tools import cascade_stats
+with import_timer("app modules"):
+    from fast_path import parse_translation_pair, run_fast_path_tools, build_synthesis_prompt
+    from document_mode import evaluate_document
+    from judge_cache import judge_cache_stats
+    from llm_client import connection_stats
+    from completion_backend import backend_stats, complete, stream_completion
+    from comet_registry import comet_registry_stats, start_comet_warm_up
+    from comet_embeddings import source_embedding_cache_stats
+    from history import compact_history, estimate_tokens
+    from streaming import StreamRenderer, streaming_stats
 
 judge_prompt = """
 You are a translation quality judge for ENGLISH → FILIPINO translations. Always use the tools provided to help you evaluate more accurately.
@@ -42,6 +62,8 @@ Be thorough but concise.
 
 def clear_chat_history():
     st.session_state["messages"] = [{"role": "system", "content": "You are Kimi, an AI assistant created by Moonshot AI."}]
+    st.session_state["tool_timings"] = {}
+    st.session_state["prompt_tokens"] = []
 
 # Tools
 tools = [{
@@ -69,6 +91,78 @@ tools = [{
                         "type": "string",
                         "description": "Optional domain-specific guidelines",
                         "default": ""
+                    },
+                    "comet_score": {
+                        "type": "number",
+                        "description": "Optional comet_score returned by predict_translation_quality for this pair"
+                    }
+                },
+                "required": ["source_en", "candidate_fil"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "evaluate_candidates",
+            "description": "Evaluate and rank several Filipino candidate translations of the same English source with reflection loop. Use this tool LAST instead of evaluate_translation when comparing two or more candidates for one source.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "source_en": {
+                        "type": "string",
+                        "description": "English source text shared by all candidates"
+                    },
+                    "candidates": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Filipino translation candidates to be evaluated"
+                    },
+                    "reference_fil": {
+                        "type": "string",
+                        "description": "Optional Filipino reference translation",
+                        "default": ""
+                    },
+                    "domain_guidelines": {
+                        "type": "string",
+                        "description": "Optional domain-specific guidelines",
+                        "default": ""
+                    }
+                },
+                "required": ["source_en", "candidates"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "evaluate_document",
+            "description": "Evaluate a long, multi-sentence or multi-paragraph English-to-Filipino translation. Splits it into aligned segments, judges each with reflection loop and COMET-QE, and returns a document-level score with per-segment highlights. Use this tool LAST instead of evaluate_translation for documents.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "source_en": {
+                        "type": "string",
+                        "description": "English source document"
+                    },
+                    "candidate_fil": {
+                        "type": "string",
+                        "description": "Filipino translation of the whole document"
+                    },
+                    "reference_fil": {
+                        "type": "string",
+                        "description": "Optional Filipino reference translation of the whole document",
+                        "default": ""
+                    },
+                    "domain_guidelines": {
+                        "type": "string",
+                        "description": "Optional domain-specific guidelines",
+                        "default": ""
+                    },
+                    "unit": {
+                        "type": "string",
+                        "enum": ["sentence", "paragraph"],
+                        "description": "Segment size; sentence by default"
                     }
                 },
                 "required": ["source_en", "candidate_fil"]
@@ -118,17 +212,66 @@ tools = [{
 
 tool_map = {
     "evaluate_translation": evaluate_translation_with_reflection,
+    "evaluate_candidates": evaluate_candidates_with_reflection,
+    "evaluate_document": evaluate_document,
     "predict_translation_quality": predict_translation_quality,
     "evaluate_style": style_checker,
 }
 
+@st.cache_resource(show_spinner=False)
+def get_tool_executor():
+    # Shared across sessions; independent tool calls from one assistant turn run side by side
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool-call")
+
+def run_tool_call(tool_call):
+    started = time.perf_counter()
+    tool_call_name = tool_call["function"]["name"]
+    try:
+        tool_call_args = json.loads(tool_call["function"]["arguments"])
+        tool_result = tool_map[tool_call_name](**tool_call_args)
+    except Exception as e:
+        tool_call_args = tool_call["function"]["arguments"]
+        tool_result = {"error": str(e)}
+    return tool_call_args, tool_result, time.perf_counter() - started
+
+def record_mode_stats(mode, llm_calls, elapsed):
+    # Last judgement per pipeline mode, shown side by side in the sidebar
+    st.session_state["mode_stats"][mode] = {"llm_calls": llm_calls, "wall_clock_s": round(elapsed, 2)}
+    mode_stats_placeholder.json(st.session_state["mode_stats"])
+
+def record_prompt_tokens(stats):
+    # Estimated prompt size of each request, newest last
+    turn = sum(message["role"] == "user" for message in st.session_state["messages"])
+    st.session_state["prompt_tokens"].append({"turn": turn, **stats})
+    prompt_tokens_placeholder.json(st.session_state["prompt_tokens"][-20:])
+
+def history_for_request():
+    messages, stats = compact_history(st.session_state["messages"])
+    record_prompt_tokens(stats)
+    return messages
+
+@st.cache_resource(show_spinner=False)
+def warm_up_comet():
+    # Runs once per process; loads COMET in the background so the first tool call only pays for inference
+    return start_comet_warm_up()
+
+@st.cache_resource(show_spinner=False)
+def preload_heavy_imports():
+    # Runs once per process; imports torch/comet in the background without loading a model
+    return start_background_preload()
+
 # Setup
-client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+script_started = time.perf_counter()
 model_types = ["moonshotai/kimi-k2-instruct"]
 
 # Streamlit App
 st.set_page_config(page_title="Chatbot", page_icon="🤖")
 
+if "mode_stats" not in st.session_state:
+    st.session_state["mode_stats"] = {}
+if "prompt_tokens" not in st.session_state:
+    st.session_state["prompt_tokens"] = []
+
 with st.sidebar:
     st.title('Translation Judge')
     st.write('This chatbot was created by Joel Ethan Batac and Boris Victoria')
@@ -139,8 +282,53 @@ with st.sidebar:
     show_tool_calls = st.checkbox("Show Tool Calls", value=True)
     append_judge_prompt = st.checkbox("Append Judge Prompt", value=False)
 
+    # Fast path runs the three tools directly and makes one synthesis call instead of letting the model orchestrate
+    pipeline_mode = st.radio("Pipeline mode", ["Agentic", "Fast path"], horizontal=True)
+    st.caption("Last judgement per mode")
+    mode_stats_placeholder = st.empty()
+    mode_stats_placeholder.json(st.session_state["mode_stats"])
+
+    with st.expander("COMET models", expanded=False):
+        st.json(comet_registry_stats())
+
+    with st.expander("COMET micro-batching", expanded=False):
+        st.json(comet_batcher_stats())
+
+    with st.expander("COMET worker processes", expanded=False):
+        st.json(comet_worker_stats())
+
+    with st.expander("COMET source embedding cache", expanded=False):
+        st.json(source_embedding_cache_stats())
+
+    with st.expander("Judge cache", expanded=False):
+        st.json(judge_cache_stats())
+
+    with st.expander("LLM connection reuse", expanded=False):
+        st.json(connection_stats())
+
+    with st.expander("Completion backends", expanded=False):
+        st.json(backend_stats())
+
+    with st.expander("Speculative revision", expanded=False):
+        st.json(speculation_stats())
+
+    with st.expander("Judge cascade", expanded=False):
+        st.json(cascade_stats())
+
+    with st.expander("Streaming render", expanded=False):
+        st.json(streaming_stats())
+
+    with st.expander("Prompt tokens per request", expanded=False):
+        prompt_tokens_placeholder = st.empty()
+        prompt_tokens_placeholder.json(st.session_state["prompt_tokens"][-20:])
+
+    with st.expander("Startup timing", expanded=False):
+        startup_placeholder = st.empty()
+
 if "messages" not in st.session_state:
     st.session_state["messages"] = [{"role": "system", "content": "You are Kimi, an AI assistant created by Moonshot AI."}]
+if "tool_timings" not in st.session_state:
+    st.session_state["tool_timings"] = {}  # tool_call_id -> seconds
 
 # Display chat history
 for message in st.session_state["messages"]:
@@ -160,7 +348,9 @@ for message in st.session_state["messages"]:
             if show_tool_calls:
                 with st.expander("🔧 Tool Call", expanded=False):
                     for tool_call in message["tool_calls"]:
-                        st.code(f"Function: {tool_call['function']['name']}\nArguments: {tool_call['function']['arguments']}", language="json")
+                        elapsed = st.session_state["tool_timings"].get(tool_call["id"])
+                        timing = f"\nTime: {elapsed:.2f}s" if elapsed is not None else ""
+                        st.code(f"Function: {tool_call['function']['name']}\nArguments: {tool_call['function']['arguments']}{timing}", language="json")
             # If there's also content, show it
             if message.get("content"):
                 st.markdown(message["content"])
@@ -172,6 +362,14 @@ for message in st.session_state["messages"]:
 # Chat input
 user_input = st.chat_input("Type your message here...")
 
+# The page is painted by now; heavy imports/model loading happen off the render path
+record_timing("first script run", time.perf_counter() - script_started)
+if st.secrets.get("COMET_WARM_UP", False):
+    warm_up_comet()
+elif st.secrets.get("PRELOAD_HEAVY_IMPORTS", False):
+    preload_heavy_imports()
+startup_placeholder.json(startup_report())
+
 if user_input:
     # Add user message to session state and display
     if append_judge_prompt:
@@ -182,7 +380,64 @@ if user_input:
         st.session_state["messages"].append({"role": "user", "content": user_input})
         with st.chat_message("user"):
             st.markdown(user_input)
-    
+
+    fast_path_pair = parse_translation_pair(user_input) if pipeline_mode == "Fast path" else None
+    if pipeline_mode == "Fast path" and fast_path_pair is None:
+        st.warning("Couldn't find a source/translation pair in the message, so it was handled in agentic mode.")
+
+    if fast_path_pair is not None:
+        with st.chat_message("assistant"):
+            judgement_started = time.perf_counter()
+            with st.spinner("Running COMET-QE, style check and reflection evaluation..."):
+                fast_path_run = run_fast_path_tools(fast_path_pair, get_tool_executor())
+
+            if show_tool_calls:
+                for tool_call_name, entry in fast_path_run["tools"].items():
+                    with st.expander(f"📊 Tool Result: {tool_call_name} ({entry['elapsed_s']:.2f}s)", expanded=False):
+                        st.json(entry["result"])
+
+            # Single synthesis call over the tool results
+            synthesis_messages = [
+                st.session_state["messages"][0],
+                {"role": "user", "content": build_synthesis_prompt(judge_prompt, fast_path_pair, fast_path_run["tools"])},
+            ]
+            record_prompt_tokens({"prompt_tokens": estimate_tokens(synthesis_messages)})
+            message_placeholder = st.empty()
+            full_response = ""
+            try:
+                if streaming_enabled:
+                    stream = stream_completion(
+                        "chat",
+                        synthesis_messages,
+                        model=model_types[0],
+                        temperature=0.0,
+                        max_completion_tokens=4096,
+                        top_p=1
+                    )
+                    renderer = StreamRenderer(message_placeholder)
+                    for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            renderer.append(chunk.choices[0].delta.content)
+                    full_response = renderer.finish()
+                else:
+                    completion = complete(
+                        "chat",
+                        synthesis_messages,
+                        model=model_types[0],
+                        temperature=0.0,
+                        max_completion_tokens=4096,
+                        top_p=1
+                    )
+                    full_response = completion.choices[0].message.content or ""
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+
+            if full_response:
+                message_placeholder.markdown(full_response)
+                st.session_state["messages"].append({"role": "assistant", "content": full_response})
+            record_mode_stats("Fast path", fast_path_run["llm_calls"] + 1, time.perf_counter() - judgement_started)
+        st.stop()
+
     # Assistant response container
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
@@ -191,24 +446,28 @@ if user_input:
         # Process the conversation
         full_response = ""
         tool_processing = False
+        judgement_started = time.perf_counter()
+        llm_calls = 0
         
         while True:
             try:
+                llm_calls += 1
+                request_messages = history_for_request()
                 if streaming_enabled:
                     # Streaming completion
-                    stream = client.chat.completions.create(
+                    stream = stream_completion(
+                        "chat",
+                        request_messages,
                         model=model_types[0],
-                        messages=st.session_state["messages"],
                         temperature=0.0,
                         max_completion_tokens=4096,
                         top_p=1,
-                        stream=True,
                         tools=tools,
                         tool_choice="auto"
                     )
                     
                     # Collect the streaming response
-                    full_response = ""
+                    renderer = StreamRenderer(message_placeholder)
                     tool_calls = []
                     current_tool_call = None
                     
@@ -240,28 +499,26 @@ if user_input:
                                         tool_status_placeholder.info(f"🔧 Calling function: {current_tool_call['function']['name']}...")
                         
                         elif chunk.choices[0].delta.content:
-                            # Regular content streaming
-                            full_response += chunk.choices[0].delta.content
-                            message_placeholder.markdown(full_response + "▌")
+                            # Regular content streaming, rendered on a throttled cadence
+                            renderer.append(chunk.choices[0].delta.content)
                         
                         # Check finish reason
                         if chunk.choices[0].finish_reason:
                             finish_reason = chunk.choices[0].finish_reason
                             break
                     
-                    # Remove cursor
-                    if full_response:
-                        message_placeholder.markdown(full_response)
+                    # Final flush without the cursor
+                    full_response = renderer.finish()
                     
                 else:
                     # Non-streaming completion
-                    completion = client.chat.completions.create(
+                    completion = complete(
+                        "chat",
+                        request_messages,
                         model=model_types[0],
-                        messages=st.session_state["messages"],
                         temperature=0.0,
                         max_completion_tokens=4096,
                         top_p=1,
-                        stream=False,
                         tools=tools,
                         tool_choice="auto"
                     )
@@ -293,23 +550,29 @@ if user_input:
                         assistant_msg["tool_calls"] = tool_calls
                     st.session_state["messages"].append(assistant_msg)
                     
-                    # Process each tool call
-                    for tool_call in tool_calls:
+                    # Show tool execution
+                    if show_tool_calls:
+                        with tool_status_placeholder.container():
+                            for tool_call in tool_calls:
+                                st.info(f"🔧 Executing: {tool_call['function']['name']}({tool_call['function']['arguments']})")
+
+                    # Execute all tool calls of this turn concurrently; results are consumed in tool_call order
+                    turn_started = time.perf_counter()
+                    futures = [get_tool_executor().submit(run_tool_call, tool_call) for tool_call in tool_calls]
+                    tool_outputs = [future.result() for future in futures]
+                    turn_elapsed = time.perf_counter() - turn_started
+                    llm_calls += sum(
+                        count_llm_calls(tool_call["function"]["name"], tool_result)
+                        for tool_call, (_, tool_result, _) in zip(tool_calls, tool_outputs)
+                    )
+
+                    for tool_call, (tool_call_args, tool_result, elapsed) in zip(tool_calls, tool_outputs):
                         tool_call_name = tool_call["function"]["name"]
-                        tool_call_args = json.loads(tool_call["function"]["arguments"])
-                        
-                        # Show tool execution
-                        if show_tool_calls:
-                            with tool_status_placeholder.container():
-                                st.info(f"🔧 Executing: {tool_call_name}({tool_call_args})")
-                        
-                        # Execute the tool
-                        tool_function = tool_map[tool_call_name]
-                        tool_result = tool_function(**tool_call_args)
-                        
+                        st.session_state["tool_timings"][tool_call["id"]] = elapsed
+
                         # Show tool result
                         if show_tool_calls:
-                            with st.expander(f"📊 Tool Result: {tool_call_name}", expanded=True):
+                            with st.expander(f"📊 Tool Result: {tool_call_name} ({elapsed:.2f}s)", expanded=True):
                                 st.write(full_response)
                                 st.json(tool_result)
                         
@@ -323,6 +586,9 @@ if user_input:
                     
                     # Clear tool status
                     tool_status_placeholder.empty()
+                    if show_tool_calls and len(tool_calls) > 1:
+                        total_elapsed = sum(elapsed for _, _, elapsed in tool_outputs)
+                        st.caption(f"⏱️ {len(tool_calls)} tools ran in {turn_elapsed:.2f}s (sequential would be {total_elapsed:.2f}s)")
                     
                     # Continue the conversation to get final response
                     continue
@@ -331,6 +597,7 @@ if user_input:
                     # Regular message, save and exit loop
                     if full_response:
                         st.session_state["messages"].append({"role": "assistant", "content": full_response})
+                    record_mode_stats("Agentic", llm_calls, time.perf_counter() - judgement_started)
                     break
                     
             except Exception as e:
@@ -0,0 +1,113 @@
+"""
+Benchmark the cheap-model judge cascade against always escalating to the full reflection pipeline.
+
+Usage:
+    python benchmark_cascade.py labelled.jsonl --concurrency 16 --output report.json
+
+Rows need source_en and candidate_fil, and may have reference_fil, domain_guidelines, comet_score
+and a gold_score / gold_label. Both runs bypass the cache. The report has the escalation rate and
+reasons, per-tier latency and tokens, and how often the cascade agrees with always-escalate.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmark_pipelines import agreement, load_rows, percentile, summarize
+from tools import CASCADE_POLICY, evaluate_translation_with_reflection_async
+
+
+async def run_policy(rows: list, policy: dict, concurrency: int, schema: str = None) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(row):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await evaluate_translation_with_reflection_async(
+                row["source_en"],
+                row["candidate_fil"],
+                row.get("reference_fil", ""),
+                row.get("domain_guidelines", ""),
+                use_cache=False,
+                comet_score=row.get("comet_score"),
+                schema=schema,
+                cascade_policy=policy,
+            )
+            return result, time.perf_counter() - started
+
+    return await asyncio.gather(*(run_one(row) for row in rows))
+
+
+def summarize_tiers(runs: list) -> dict:
+    cascades = [result["cascade"] for result, _ in runs if "cascade" in result]
+    escalated = [cascade for cascade in cascades if cascade["escalated"]]
+    reasons = {}
+    for cascade in escalated:
+        for reason in cascade["reasons"]:
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    tiers = {}
+    for tier, tier_cascades in (("cheap", cascades), ("expensive", escalated)):
+        latencies = [cascade["tier_latency_s"][tier] for cascade in tier_cascades]
+        usages = [cascade["usage_by_tier"][tier] for cascade in tier_cascades]
+        tiers[tier] = {
+            "calls": len(tier_cascades),
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p95_s": percentile(latencies, 95),
+            "prompt_tokens": sum(usage.get("prompt_tokens", 0) for usage in usages),
+            "completion_tokens": sum(usage.get("completion_tokens", 0) for usage in usages),
+        }
+    return {
+        "judgements": len(cascades),
+        "escalated": len(escalated),
+        "escalation_rate": len(escalated) / len(cascades) if cascades else None,
+        "reasons": reasons,
+        "tiers": tiers,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the judge cascade with always escalating to the reflection pipeline.")
+    parser.add_argument("input", help="Labelled JSONL")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--schema", choices=["full", "compact"], default=None, help="Output schema used by both runs")
+    parser.add_argument("--cheap-model", default=CASCADE_POLICY["cheap_model"])
+    parser.add_argument("--min-confidence", type=float, default=CASCADE_POLICY["min_confidence"])
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    rows = load_rows(args.input)
+    policy = {**CASCADE_POLICY, "enabled": True, "cheap_model": args.cheap_model, "min_confidence": args.min_confidence}
+    cascade_runs = asyncio.run(run_policy(rows, policy, args.concurrency, args.schema))
+    escalate_runs = asyncio.run(run_policy(rows, {**policy, "enabled": False}, args.concurrency, args.schema))
+
+    report = {
+        "rows": len(rows),
+        "cheap_model": args.cheap_model,
+        "modes": {"cascade": summarize(rows, cascade_runs), "always_escalate": summarize(rows, escalate_runs)},
+        "cascade": summarize_tiers(cascade_runs),
+        "agreement_cascade_vs_always_escalate": agreement(escalate_runs, cascade_runs),
+    }
+
+    for mode, summary in report["modes"].items():
+        print(
+            f"{mode:>15}: calls={summary['llm_calls']} prompt_tokens={summary['prompt_tokens']} "
+            f"completion_tokens={summary['completion_tokens']} p50={summary['latency_p50_s']} p95={summary['latency_p95_s']} "
+            f"gold_score_acc={summary['gold_score_accuracy']} gold_label_acc={summary['gold_label_accuracy']} errors={summary['errors']}"
+        )
+    cascade = report["cascade"]
+    print(f"escalation_rate={cascade['escalation_rate']} ({cascade['escalated']}/{cascade['judgements']}) reasons={cascade['reasons']}")
+    for tier, stats in cascade["tiers"].items():
+        print(f"{tier:>15}: calls={stats['calls']} p50={stats['latency_p50_s']} p95={stats['latency_p95_s']} prompt_tokens={stats['prompt_tokens']}")
+    agree = report["agreement_cascade_vs_always_escalate"]
+    print(f"agreement: score={agree['score_agreement']} label={agree['label_agreement']} over {agree['compared']} rows")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
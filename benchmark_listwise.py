@@ -0,0 +1,147 @@
+"""
+Benchmark listwise multi-candidate judging against judging each candidate separately.
+
+Usage:
+    python benchmark_listwise.py labelled.jsonl --concurrency 16 --output report.json
+
+Rows need source_en and candidate_fil, and may have reference_fil, domain_guidelines and a
+gold_score. Rows sharing a source_en form one group; the listwise path makes one request per stage
+per group (or chunk), the per-candidate path runs the usual pipeline for every row. Both run with
+the cache bypassed so latency and tokens are real.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmark_pipelines import load_rows, percentile
+from tools import count_llm_calls, evaluate_candidates_with_reflection_async, evaluate_translation_with_reflection_async
+
+
+def group_rows(rows: list) -> list:
+    groups = {}
+    for row in rows:
+        groups.setdefault(row["source_en"], []).append(row)
+    return list(groups.values())
+
+
+async def run_listwise(groups: list, concurrency: int, schema: str = None) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_group(group):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await evaluate_candidates_with_reflection_async(
+                group[0]["source_en"],
+                [row["candidate_fil"] for row in group],
+                group[0].get("reference_fil", ""),
+                group[0].get("domain_guidelines", ""),
+                use_cache=False,
+                schema=schema,
+            )
+            return result, time.perf_counter() - started
+
+    return await asyncio.gather(*(run_group(group) for group in groups))
+
+
+async def run_per_candidate(groups: list, concurrency: int, schema: str = None) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(row):
+        async with semaphore:
+            return await evaluate_translation_with_reflection_async(
+                row["source_en"],
+                row["candidate_fil"],
+                row.get("reference_fil", ""),
+                row.get("domain_guidelines", ""),
+                use_cache=False,
+                schema=schema,
+            )
+
+    async def run_group(group):
+        # A group is done when its slowest candidate is, the same unit the listwise path is timed on
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run_one(row) for row in group))
+        return results, time.perf_counter() - started
+
+    return await asyncio.gather(*(run_group(group) for group in groups))
+
+
+def summarize(groups: list, group_results: list, group_latencies: list, llm_calls: int) -> dict:
+    rows = [row for group in groups for row in group]
+    results = [result for group in group_results for result in group]
+    ok = [(row, result) for row, result in zip(rows, results) if "error" not in result]
+    gold_scores = [(row["gold_score"], result["final_evaluation"].get("score")) for row, result in ok if row.get("gold_score") is not None]
+    return {
+        "evaluated": len(ok),
+        "errors": len(rows) - len(ok),
+        "llm_calls": llm_calls,
+        "latency_p50_s": round(percentile(group_latencies, 50), 3) if group_latencies else None,
+        "latency_p95_s": round(percentile(group_latencies, 95), 3) if group_latencies else None,
+        "gold_score_accuracy": sum(gold == score for gold, score in gold_scores) / len(gold_scores) if gold_scores else None,
+    }
+
+
+def total_usage(usages: list) -> dict:
+    return {
+        "prompt_tokens": sum(usage.get("prompt_tokens", 0) for usage in usages),
+        "completion_tokens": sum(usage.get("completion_tokens", 0) for usage in usages),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare listwise multi-candidate judging with per-candidate judging.")
+    parser.add_argument("input", help="Labelled JSONL")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--schema", choices=["full", "compact"], default=None, help="Output schema used by both paths")
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    groups = group_rows(load_rows(args.input))
+    listwise_runs = asyncio.run(run_listwise(groups, args.concurrency, args.schema))
+    per_candidate_runs = asyncio.run(run_per_candidate(groups, args.concurrency, args.schema))
+
+    listwise = summarize(
+        groups,
+        [result["candidates"] for result, _ in listwise_runs],
+        [latency for _, latency in listwise_runs],
+        sum(result["llm_calls"] for result, _ in listwise_runs),
+    )
+    listwise.update(total_usage([result["usage"] for result, _ in listwise_runs]))
+    per_candidate = summarize(
+        groups,
+        [results for results, _ in per_candidate_runs],
+        [latency for _, latency in per_candidate_runs],
+        sum(count_llm_calls("evaluate_translation", result) for results, _ in per_candidate_runs for result in results),
+    )
+    per_candidate.update(total_usage([result.get("usage", {}) for results, _ in per_candidate_runs for result in results]))
+
+    report = {
+        "rows": sum(len(group) for group in groups),
+        "groups": len(groups),
+        "modes": {"listwise": listwise, "per_candidate": per_candidate},
+        "prompt_tokens_saved": per_candidate["prompt_tokens"] - listwise["prompt_tokens"],
+        "completion_tokens_saved": per_candidate["completion_tokens"] - listwise["completion_tokens"],
+        "llm_calls_saved": per_candidate["llm_calls"] - listwise["llm_calls"],
+    }
+
+    for mode, summary in report["modes"].items():
+        print(
+            f"{mode:>13}: calls={summary['llm_calls']} prompt_tokens={summary['prompt_tokens']} "
+            f"completion_tokens={summary['completion_tokens']} group_p50={summary['latency_p50_s']} group_p95={summary['latency_p95_s']} "
+            f"gold_score_acc={summary['gold_score_accuracy']} errors={summary['errors']}"
+        )
+    print(
+        f"saved: calls={report['llm_calls_saved']} prompt_tokens={report['prompt_tokens_saved']} "
+        f"completion_tokens={report['completion_tokens_saved']} over {report['groups']} groups"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
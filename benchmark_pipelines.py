@@ -0,0 +1,123 @@
+"""
+Benchmark the three-call reflection pipeline against the single-call reflect-and-revise mode.
+
+Usage:
+    python benchmark_pipelines.py labelled.jsonl --concurrency 16 --output report.json
+
+Rows need source_en and candidate_fil, and may have reference_fil, domain_guidelines and a
+gold_score / gold_label. Both modes run with the cache bypassed so latency and tokens are real.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from tools import count_llm_calls, evaluate_translation_with_reflection_async
+
+MODES = ["three_call", "combined"]
+
+
+def load_rows(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(rows: list, mode: str, concurrency: int, schema: str = None) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(row):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await evaluate_translation_with_reflection_async(
+                row["source_en"],
+                row["candidate_fil"],
+                row.get("reference_fil", ""),
+                row.get("domain_guidelines", ""),
+                use_cache=False,
+                pipeline_mode=mode,
+                schema=schema,
+            )
+            return result, time.perf_counter() - started
+
+    return await asyncio.gather(*(run_one(row) for row in rows))
+
+
+def summarize(rows: list, runs: list) -> dict:
+    ok = [(row, result, latency) for row, (result, latency) in zip(rows, runs) if "error" not in result]
+    latencies = [latency for _, _, latency in ok]
+    gold_scores = [(row["gold_score"], result["final_evaluation"].get("score")) for row, result, _ in ok if row.get("gold_score") is not None]
+    gold_labels = [
+        (str(row["gold_label"]).lower(), str(result["final_evaluation"].get("label", "")).lower())
+        for row, result, _ in ok if row.get("gold_label") is not None
+    ]
+    return {
+        "evaluated": len(ok),
+        "errors": len(rows) - len(ok),
+        "llm_calls": sum(count_llm_calls("evaluate_translation", result) for _, result, _ in ok),
+        "prompt_tokens": sum(result.get("usage", {}).get("prompt_tokens", 0) for _, result, _ in ok),
+        "completion_tokens": sum(result.get("usage", {}).get("completion_tokens", 0) for _, result, _ in ok),
+        "latency_p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "latency_p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+        "gold_score_accuracy": sum(gold == score for gold, score in gold_scores) / len(gold_scores) if gold_scores else None,
+        "gold_label_accuracy": sum(gold == label for gold, label in gold_labels) / len(gold_labels) if gold_labels else None,
+    }
+
+
+def agreement(runs_a: list, runs_b: list) -> dict:
+    pairs = [
+        (a["final_evaluation"], b["final_evaluation"])
+        for (a, _), (b, _) in zip(runs_a, runs_b)
+        if "error" not in a and "error" not in b
+    ]
+    if not pairs:
+        return {"compared": 0, "score_agreement": None, "label_agreement": None}
+    return {
+        "compared": len(pairs),
+        "score_agreement": sum(a.get("score") == b.get("score") for a, b in pairs) / len(pairs),
+        "label_agreement": sum(str(a.get("label", "")).lower() == str(b.get("label", "")).lower() for a, b in pairs) / len(pairs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the three-call and combined reflection pipelines.")
+    parser.add_argument("input", help="Labelled JSONL")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--schema", choices=["full", "compact"], default=None, help="Output schema used by both modes")
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    rows = load_rows(args.input)
+    runs = {mode: asyncio.run(run_mode(rows, mode, args.concurrency, args.schema)) for mode in MODES}
+
+    report = {
+        "rows": len(rows),
+        "modes": {mode: summarize(rows, runs[mode]) for mode in MODES},
+        "agreement_combined_vs_three_call": agreement(runs["three_call"], runs["combined"]),
+    }
+
+    for mode, summary in report["modes"].items():
+        print(
+            f"{mode:>10}: calls={summary['llm_calls']} prompt_tokens={summary['prompt_tokens']} "
+            f"completion_tokens={summary['completion_tokens']} p50={summary['latency_p50_s']} p95={summary['latency_p95_s']} "
+            f"gold_score_acc={summary['gold_score_accuracy']} gold_label_acc={summary['gold_label_accuracy']} errors={summary['errors']}"
+        )
+    agree = report["agreement_combined_vs_three_call"]
+    print(f"agreement: score={agree['score_agreement']} label={agree['label_agreement']} over {agree['compared']} rows")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
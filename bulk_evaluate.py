@@ -0,0 +1,188 @@
+"""
+Headless bulk evaluation over a JSONL/CSV corpus.
+
+Usage:
+    python bulk_evaluate.py corpus.jsonl results.jsonl --concurrency 64
+
+Each input row needs source_en and candidate_fil, and may have reference_fil and domain_guidelines.
+Results are appended to the output JSONL as soon as each row finishes. Re-running the same command
+after a crash skips every row already in the output, so finished rows don't spend tokens again.
+Rows that errored are skipped too unless --retry-errors is given; a retried row gets a second record,
+so readers of the output should keep the last record per row.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+from tools import evaluate_translation_with_reflection_async, speculation_stats
+
+COLUMNS = ["source_en", "candidate_fil", "reference_fil", "domain_guidelines"]
+
+
+def read_corpus(path: str):
+    """
+    Streams (row_index, row) pairs from a JSONL or CSV file without loading it into memory
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row_index, row in enumerate(csv.DictReader(f)):
+                yield row_index, row
+    else:
+        with open(path, encoding="utf-8") as f:
+            row_index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                yield row_index, json.loads(line)
+                row_index += 1
+
+
+def completed_rows(output_path: str, retry_errors: bool = False) -> set:
+    """
+    Row indices that already have a result in the output file; with retry_errors, only successful ones
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from a crash; that row will be re-run
+                continue
+            if "error" not in record.get("result", {}):
+                done.add(record["row"])
+            elif not retry_errors:
+                done.add(record["row"])
+    return done
+
+
+async def evaluate_row(row_index: int, row: dict, use_cache: bool = True, speculative: bool = False, schema: str = None) -> dict:
+    started = time.perf_counter()
+    try:
+        result = await evaluate_translation_with_reflection_async(
+            source_en=row["source_en"],
+            candidate_fil=row["candidate_fil"],
+            reference_fil=row.get("reference_fil") or "",
+            domain_guidelines=row.get("domain_guidelines") or "",
+            use_cache=use_cache,
+            speculative=speculative,
+            schema=schema,
+        )
+    except Exception as e:
+        result = {"error": str(e)}
+    return {
+        "row": row_index,
+        **{column: row.get(column) or "" for column in COLUMNS},
+        "result": result,
+        "latency_s": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_async(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    limit: int = None,
+    use_cache: bool = True,
+    speculative: bool = False,
+    schema: str = None,
+    retry_errors: bool = False
+):
+    done = completed_rows(output_path, retry_errors)
+    if done:
+        print(f"Resuming: {len(done)} rows already completed in {output_path}")
+
+    written = 0
+    failed = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        # Terminate a partially written last line so the next record starts on its own line
+        if out.tell() > 0:
+            with open(output_path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    out.write("\n")
+        pending = set()
+
+        async def drain(return_when):
+            nonlocal written, failed
+            finished, still_pending = await asyncio.wait(pending, return_when=return_when)
+            for task in finished:
+                record = task.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                written += 1
+                if "error" in record["result"]:
+                    failed += 1
+                print(f"row {record['row']} done in {record['latency_s']}s ({written} written, {failed} failed)")
+            return still_pending
+
+        for row_index, row in read_corpus(input_path):
+            if limit is not None and row_index >= limit:
+                break
+            if row_index in done:
+                continue
+            # Keep at most `concurrency` rows in flight so the corpus is streamed, not queued up front
+            if len(pending) >= concurrency:
+                pending = await drain(asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.create_task(evaluate_row(row_index, row, use_cache, speculative, schema)))
+
+        if pending:
+            await drain(asyncio.ALL_COMPLETED)
+
+    print(f"Finished: {written} rows written, {failed} failed")
+    if speculative:
+        print(f"Speculative revision: {json.dumps(speculation_stats(), indent=2)}")
+    return written, failed
+
+
+def run(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    limit: int = None,
+    use_cache: bool = True,
+    speculative: bool = False,
+    schema: str = None,
+    retry_errors: bool = False
+):
+    return asyncio.run(
+        run_async(
+            input_path, output_path, concurrency=concurrency, limit=limit, use_cache=use_cache, speculative=speculative, schema=schema, retry_errors=retry_errors
+        )
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Judge a JSONL/CSV corpus of English-to-Filipino translation pairs.")
+    parser.add_argument("input", help="Input corpus (.jsonl or .csv)")
+    parser.add_argument("output", help="Output JSONL; appended to and used to resume")
+    parser.add_argument("--concurrency", type=int, default=32, help="Pairs evaluated at the same time (async, so this can be in the hundreds)")
+    parser.add_argument("--limit", type=int, default=None, help="Only consider the first N rows")
+    parser.add_argument("--no-cache", action="store_true", help="Re-judge pairs even if a cached result exists")
+    parser.add_argument("--speculative", action="store_true", help="Run a speculative revision alongside reflection")
+    parser.add_argument("--schema", choices=["full", "compact"], default=None, help="Output schema; compact skips reasons for passing criteria")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-run rows whose earlier result was an error (appends a new record for the row)")
+    args = parser.parse_args(argv)
+
+    _, failed = run(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        limit=args.limit,
+        use_cache=not args.no_cache,
+        speculative=args.speculative,
+        schema=args.schema,
+        retry_errors=args.retry_errors
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Collects concurrent COMET scoring requests for up to max_wait_ms or max_batch_size items
+    and runs them as one batched forward pass on a background thread
+    """
+
+    def __init__(self, score_batch, max_wait_ms: float = 5, max_batch_size: int = 16, max_in_flight: int = 1):
+        # score_batch(pairs, model_name=..., batch_size=...) -> list of results in the same order
+        self.score_batch = score_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        # More than one batch in flight only helps when score_batch hands work to other processes
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix="comet-batch") if max_in_flight > 1 else None
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_size_histogram = Counter()
+        self._queue_depth_histogram = Counter()
+        self._requests = 0
+        self._batches = 0
+
+        self._thread = threading.Thread(target=self._run, name="comet-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, source_en: str, candidate_fil: str, model_name: str) -> Future:
+        future = Future()
+        with self._stats_lock:
+            self._requests += 1
+            self._queue_depth_histogram[self._queue.qsize()] += 1
+        self._queue.put((source_en, candidate_fil, model_name, future))
+        return future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "queue_depth_histogram": dict(sorted(self._queue_depth_histogram.items())),
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch_size": self.max_batch_size,
+                "max_in_flight": self.max_in_flight,
+            }
+
+    def _collect(self) -> list:
+        # Block for the first request, then keep collecting until the batch is full or the wait expires
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self._stats_lock:
+                self._batches += 1
+                self._batch_size_histogram[len(batch)] += 1
+
+            # One forward pass per model_name present in the batch
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(item[2], []).append(item)
+
+            for model_name, items in by_model.items():
+                self._in_flight.acquire()
+                if self._executor is None:
+                    self._score(model_name, items)
+                else:
+                    self._executor.submit(self._score, model_name, items)
+
+    def _score(self, model_name: str, items: list):
+        try:
+            results = self.score_batch(
+                [(source_en, candidate_fil) for source_en, candidate_fil, _, _ in items],
+                model_name=model_name,
+                batch_size=len(items),
+            )
+            for item, result in zip(items, results):
+                item[3].set_result(result)
+        except Exception as e:
+            for item in items:
+                item[3].set_exception(e)
+        finally:
+            self._in_flight.release()
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from startup import timed_import
+
+# COMET-QE encodes src and mt separately and only mixes them in the estimator head, so a source
+# judged against many candidates only needs to be encoded once. Source sentence embeddings are kept
+# in an in-memory LRU and, when SOURCE_EMBEDDING_CACHE_DIR is set, also written to disk.
+SOURCE_EMBEDDING_CACHE_MAX_ENTRIES = 10_000
+SOURCE_EMBEDDING_CACHE_DIR = None  # e.g. ".comet_src_embeddings"
+# Before a model's first cached scoring, a few pairs are scored both ways and the cache is only used
+# if every score is within this distance of model.predict
+SOURCE_CACHE_PARITY_PAIRS = 4
+SOURCE_CACHE_PARITY_MAX_ABS_DEVIATION = 0.01
+
+
+def supports_source_cache(model) -> bool:
+    # Only ReferencelessRegression (the comet-qe-da models) keeps src and mt apart until the estimator head;
+    # other COMET classes need a reference or encode src and mt jointly
+    return (
+        type(model).__name__ == "ReferencelessRegression"
+        and all(hasattr(model, name) for name in ("get_sentence_embedding", "estimator"))
+        and hasattr(model.encoder, "prepare_sample")
+    )
+
+
+class SourceEmbeddingCache:
+    def __init__(self, max_entries: int = SOURCE_EMBEDDING_CACHE_MAX_ENTRIES, cache_dir: str = SOURCE_EMBEDDING_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()  # key -> 1-D embedding tensor on CPU
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(model_name: str, source_en: str) -> str:
+        return hashlib.sha256(f"{model_name}\n{source_en}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".pt")
+
+    def get(self, key: str):
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return embedding
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            torch = timed_import("torch")
+            embedding = torch.load(self._disk_path(key), map_location="cpu", weights_only=True)
+            self._put(key, embedding)
+            with self._lock:
+                self._stats["disk_hits"] += 1
+            return embedding
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, embedding):
+        self._put(key, embedding)
+        if self.cache_dir:
+            torch = timed_import("torch")
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(embedding, tmp_path)
+            os.replace(tmp_path, path)
+
+    def _put(self, key: str, embedding):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_source_embedding_cache() -> SourceEmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SourceEmbeddingCache()
+        return _cache
+
+
+_parity = {}  # model_name -> {"ok": bool, "max_abs_deviation": float}
+_parity_lock = threading.Lock()
+
+
+def source_embedding_cache_stats() -> dict:
+    stats = _cache.stats() if _cache is not None else {}
+    with _parity_lock:
+        if _parity:
+            stats["parity"] = {name: dict(result) for name, result in _parity.items()}
+    return stats
+
+
+def _embed(model, texts: list, batch_size: int) -> list:
+    # Sentence embeddings in input order, one row tensor per text (CPU, like the rest of the scoring path)
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        inputs = model.encoder.prepare_sample(texts[start:start + batch_size])
+        embeddings.extend(model.get_sentence_embedding(inputs["input_ids"], inputs["attention_mask"]))
+    return embeddings
+
+
+def score_with_source_cache(model, pairs: list, model_name: str, batch_size: int) -> list:
+    """
+    COMET-QE scores for (source_en, candidate_fil) pairs, encoding each distinct source at most once
+    (and not at all when it is cached). Inputs should already be length-sorted by the caller.
+    """
+    torch = timed_import("torch")
+    cache = get_source_embedding_cache()
+    with torch.no_grad():
+        keys = [cache.key(model_name, source_en) for source_en, _ in pairs]
+        source_embeddings = {}
+        to_encode = {}
+        for key, (source_en, _) in zip(keys, pairs):
+            if key in source_embeddings or key in to_encode:
+                continue
+            embedding = cache.get(key)
+            if embedding is None:
+                to_encode[key] = source_en
+            else:
+                source_embeddings[key] = embedding
+        for key, embedding in zip(to_encode, _embed(model, list(to_encode.values()), batch_size)):
+            # Rows are views into the batch output; clone so the cache holds only this row
+            embedding = embedding.clone()
+            cache.set(key, embedding)
+            source_embeddings[key] = embedding
+
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            mt_embeddings = _embed(model, [candidate_fil for _, candidate_fil in pairs[start:start + batch_size]], batch_size)
+            src = torch.stack([source_embeddings[key] for key in keys[start:start + batch_size]])
+            mt = torch.stack(mt_embeddings)
+            # Same features ReferencelessRegression.forward feeds to its estimator
+            features = torch.cat((mt, src, mt * src, torch.abs(mt - src)), dim=1)
+            scores.extend(model.estimator(features).view(-1).tolist())
+    return scores
+
+
+def source_cache_verified(model, pairs: list, model_name: str, batch_size: int) -> bool:
+    """
+    True once score_with_source_cache has matched model.predict on the first few pairs scored with
+    this model in this process; a mismatch turns the source cache off for the model
+    """
+    with _parity_lock:
+        result = _parity.get(model_name)
+    if result is not None:
+        return result["ok"]
+
+    sample = pairs[:SOURCE_CACHE_PARITY_PAIRS]
+    try:
+        cached_scores = score_with_source_cache(model, sample, model_name, batch_size)
+        output = model.predict(
+            [{"src": source_en, "mt": candidate_fil} for source_en, candidate_fil in sample],
+            batch_size=batch_size,
+            gpus=0,
+            progress_bar=False,
+            length_batching=False
+        )
+        deviation = max(abs(a - float(b)) for a, b in zip(cached_scores, output.scores))
+        result = {"ok": deviation <= SOURCE_CACHE_PARITY_MAX_ABS_DEVIATION, "max_abs_deviation": deviation}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    if not result["ok"]:
+        print(f"COMET source embedding cache disabled for {model_name}: parity check failed {result}")
+    with _parity_lock:
+        _parity[model_name] = result
+    return result["ok"]
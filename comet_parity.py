@@ -0,0 +1,114 @@
+"""
+Parity and throughput check for the int8 COMET-QE backend against fp32.
+
+Usage:
+    python comet_parity.py pairs.jsonl --model Unbabel/wmt20-comet-qe-da --batch-size 16 --max-abs-deviation 0.05
+
+Rows need source_en and candidate_fil. Both backends score the same pairs in-process with neither
+the judge cache nor the source embedding cache, so every pair runs the full encoder;
+the report has Pearson/Spearman correlation, max and mean absolute deviation, and pairs/second.
+Exits non-zero when the max absolute deviation is above --max-abs-deviation.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import tools
+from comet_registry import INT8_SUFFIX, get_comet_model
+from tools import _score_with_model
+
+
+def load_rows(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def pearson(xs: list, ys: list):
+    n = len(xs)
+    if n < 2:
+        return None
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    var_y = sum((y - mean_y) ** 2 for y in ys)
+    if not var_x or not var_y:
+        return None
+    return cov / math.sqrt(var_x * var_y)
+
+
+def ranks(values: list) -> list:
+    # Average ranks for ties
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    result = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            result[order[k]] = (i + j) / 2
+        i = j + 1
+    return result
+
+
+def score_backend(model_name: str, pairs: list, batch_size: int) -> tuple:
+    model = get_comet_model(model_name)
+    # The warm-up would fill the source embedding cache, and the timed run would then mostly measure the cache
+    source_cache = tools.COMET_SOURCE_EMBEDDING_CACHE
+    tools.COMET_SOURCE_EMBEDDING_CACHE = False
+    try:
+        # Warm-up pass so one-off costs (thread pools, first allocations) don't count as throughput
+        _score_with_model(model, pairs[:batch_size], model_name, batch_size)
+        started = time.perf_counter()
+        results = _score_with_model(model, pairs, model_name, batch_size)
+    finally:
+        tools.COMET_SOURCE_EMBEDDING_CACHE = source_cache
+    return [result["comet_score"] for result in results], time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare int8 and fp32 COMET-QE scores and throughput.")
+    parser.add_argument("input", help="JSONL with source_en and candidate_fil")
+    parser.add_argument("--model", default="Unbabel/wmt20-comet-qe-da")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--max-abs-deviation", type=float, default=None, help="Fail if any score moves more than this")
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    rows = load_rows(args.input)[:args.limit]
+    pairs = [(row["source_en"], row["candidate_fil"]) for row in rows]
+    if not pairs:
+        print("No pairs to score")
+        return 1
+
+    fp32_scores, fp32_elapsed = score_backend(args.model, pairs, args.batch_size)
+    int8_scores, int8_elapsed = score_backend(args.model + INT8_SUFFIX, pairs, args.batch_size)
+
+    deviations = [abs(a - b) for a, b in zip(fp32_scores, int8_scores)]
+    report = {
+        "model": args.model,
+        "pairs": len(pairs),
+        "pearson": pearson(fp32_scores, int8_scores),
+        "spearman": pearson(ranks(fp32_scores), ranks(int8_scores)),
+        "max_abs_deviation": max(deviations),
+        "mean_abs_deviation": sum(deviations) / len(deviations),
+        "fp32_pairs_per_s": len(pairs) / fp32_elapsed,
+        "int8_pairs_per_s": len(pairs) / int8_elapsed,
+        "speedup": fp32_elapsed / int8_elapsed,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.max_abs_deviation is not None and report["max_abs_deviation"] > args.max_abs_deviation:
+        print(f"max_abs_deviation {report['max_abs_deviation']:.4f} is above {args.max_abs_deviation}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+from startup import timed_import
+
+# Eviction policy for when several COMET-QE variants are requested in one process.
+# The least recently used model is dropped once either limit would be exceeded.
+COMET_CACHE_MAX_MODELS = 2
+COMET_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+# Appending this suffix to a model name (e.g. "Unbabel/wmt20-comet-qe-da:int8") selects the CPU
+# backend: the same checkpoint with its Linear layers dynamically quantized to int8.
+# Check it against fp32 with comet_parity.py before switching.
+INT8_SUFFIX = ":int8"
+
+_models = OrderedDict()  # model_name -> {"model": ..., "size_bytes": int}
+_lock = threading.Lock()  # guards _models, _loading_locks and _stats; never held while loading
+_loading_locks = {}  # model_name -> lock held by the thread loading that model
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _model_size_bytes(model) -> int:
+    return sum(p.numel() * p.element_size() for p in model.parameters())
+
+
+def split_backend(model_name: str) -> tuple:
+    """
+    "name:int8" -> ("name", True); plain names -> (name, False)
+    """
+    if model_name.endswith(INT8_SUFFIX):
+        return model_name[:-len(INT8_SUFFIX)], True
+    return model_name, False
+
+
+def quantize_comet_model(model):
+    """
+    Dynamic int8 quantization of every Linear layer (the encoder's attention/FFN and the estimator), in place
+    """
+    torch = timed_import("torch")
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def _evict_if_needed(incoming_bytes: int):
+    total_bytes = sum(entry["size_bytes"] for entry in _models.values())
+    while _models and (
+        len(_models) >= COMET_CACHE_MAX_MODELS
+        or total_bytes + incoming_bytes > COMET_CACHE_MAX_BYTES
+    ):
+        evicted_name, evicted = _models.popitem(last=False)
+        total_bytes -= evicted["size_bytes"]
+        _stats["evictions"] += 1
+        print(f"Evicted COMET model {evicted_name} ({evicted['size_bytes'] / 1024 ** 2:.0f} MB)")
+
+
+def get_comet_model(model_name: str = "Unbabel/wmt20-comet-qe-da"):
+    """
+    Returns a loaded COMET model, loading it only the first time it is requested in this process
+    """
+    with _lock:
+        entry = _models.get(model_name)
+        if entry is not None:
+            _models.move_to_end(model_name)
+            _stats["hits"] += 1
+            return entry["model"]
+        loading_lock = _loading_locks.setdefault(model_name, threading.Lock())
+
+    # Only callers of this model wait for the load; other models stay available meanwhile
+    with loading_lock:
+        with _lock:
+            entry = _models.get(model_name)
+            if entry is not None:
+                # Loaded by another thread while this one waited
+                _models.move_to_end(model_name)
+                _stats["hits"] += 1
+                return entry["model"]
+            _stats["misses"] += 1
+
+        # comet pulls in torch; import it only once a model is actually needed
+        comet = timed_import("comet")
+        checkpoint_name, int8 = split_backend(model_name)
+        model_path = comet.download_model(checkpoint_name)
+        model = comet.load_from_checkpoint(model_path)
+        model.eval()
+        # Quantized weights are packed outside parameters(), so the size is taken before quantizing
+        size_bytes = _model_size_bytes(model)
+        if int8:
+            quantize_comet_model(model)
+
+        with _lock:
+            _evict_if_needed(size_bytes)
+            _models[model_name] = {"model": model, "size_bytes": size_bytes}
+        return model
+
+
+def warm_up_comet_models(model_names=("Unbabel/wmt20-comet-qe-da",)):
+    """
+    Eagerly loads the given COMET models so the first scoring call only pays for inference
+    """
+    for model_name in model_names:
+        try:
+            get_comet_model(model_name)
+        except Exception as e:
+            print(f"COMET warm-up failed for {model_name}: {e}")
+
+
+def start_comet_warm_up(model_names=("Unbabel/wmt20-comet-qe-da",)) -> threading.Thread:
+    thread = threading.Thread(target=warm_up_comet_models, args=(model_names,), daemon=True)
+    thread.start()
+    return thread
+
+
+def comet_registry_stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "loaded_models": {name: entry["size_bytes"] for name, entry in _models.items()},
+        }
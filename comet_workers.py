@@ -0,0 +1,278 @@
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from multiprocessing.connection import wait
+
+from comet_registry import quantize_comet_model, split_backend
+from startup import timed_import
+
+# Shared weights are written once per model as a plain state_dict and memory-mapped read-only by every
+# worker, so the pages are shared through the OS page cache instead of each worker holding a copy.
+COMET_WEIGHTS_DIR = ".comet_weights"
+# A worker that keeps dying right after it starts (e.g. the model can't load) is restarted with
+# exponential backoff instead of in a tight loop
+WORKER_RAPID_FAILURE_SECONDS = 5
+WORKER_RESTART_BACKOFF_MAX_SECONDS = 30
+
+
+def _weights_path(weights_dir: str, model_name: str) -> str:
+    return os.path.join(weights_dir, model_name.replace("/", "__") + ".pt")
+
+
+def load_shared_comet_model(model_name: str, weights_dir: str = COMET_WEIGHTS_DIR):
+    """
+    Loads a COMET model whose parameters are backed by a memory-mapped weights file. The checkpoint
+    is still read once to build the model; its tensors are then swapped for the shared mmap views.
+    An int8 model shares the fp32 file and is quantized per worker (its packed weights can't be mapped).
+    """
+    torch = timed_import("torch")
+    comet = timed_import("comet")
+    checkpoint_name, int8 = split_backend(model_name)
+    model = comet.load_from_checkpoint(comet.download_model(checkpoint_name))
+    model.eval()
+
+    path = _weights_path(weights_dir, checkpoint_name)
+    if not os.path.exists(path):
+        os.makedirs(weights_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(model.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+
+    state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    if int8:
+        quantize_comet_model(model)
+    return model
+
+
+def _worker_main(score_fn, conn, weights_dir):
+    # Runs in the worker process: score requests one at a time until the pipe closes
+    models = {}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        request_id, pairs, model_name, batch_size = request
+        # ok=None marks the start, so the pool can tell a hung request from one still queued behind others
+        conn.send((request_id, None, None))
+        try:
+            if model_name not in models:
+                models[model_name] = load_shared_comet_model(model_name, weights_dir)
+            conn.send((request_id, True, score_fn(models[model_name], pairs, model_name, batch_size)))
+        except Exception as e:
+            conn.send((request_id, False, str(e)))
+
+
+class CometWorkerPool:
+    """
+    Scores COMET batches in separate processes so a forward pass never runs on a Streamlit script
+    thread. Each worker has its own pipe; dead or hung workers are replaced and their queued
+    requests are retried once on the new worker.
+    """
+
+    def __init__(self, score_fn, processes: int = 2, timeout_s: float = 120, weights_dir: str = COMET_WEIGHTS_DIR):
+        # score_fn(model, pairs, model_name, batch_size) -> list of results; must be importable by name
+        self.score_fn = score_fn
+        self.processes = processes
+        self.timeout_s = timeout_s
+        self.weights_dir = weights_dir
+
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._workers = [None] * processes
+        self._rapid_failures = [0] * processes
+        self._restart_at = [0.0] * processes
+        self._pending = {}  # request_id -> {"future", "slot", "request", "retried"}
+        self._stats = {"requests": 0, "completed": 0, "errors": 0, "timeouts": 0, "crashes": 0, "restarts": 0, "retried": 0}
+        self._closed = False
+
+        for slot in range(processes):
+            self._start_worker(slot)
+        self._collector = threading.Thread(target=self._collect, name="comet-worker-results", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self, slot: int):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.score_fn, child_conn, self.weights_dir),
+            name=f"comet-worker-{slot}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._workers[slot] = {
+            "process": process,
+            "conn": parent_conn,
+            "send_lock": threading.Lock(),
+            "in_flight": set(),
+            "started_at": time.monotonic(),
+            "current": None,  # (request_id, started_at) of the request the worker is running
+        }
+
+    def _send(self, request_id: int):
+        # Caller holds self._lock; picks the least busy worker
+        slot = min(range(self.processes), key=lambda i: len(self._workers[i]["in_flight"]))
+        worker = self._workers[slot]
+        entry = self._pending[request_id]
+        entry["slot"] = slot
+        worker["in_flight"].add(request_id)
+        return worker, entry["request"]
+
+    def _submit(self, pairs: list, model_name: str, batch_size: int):
+        future = Future()
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = {"future": future, "slot": None, "request": (request_id, pairs, model_name, batch_size), "retried": False}
+            self._stats["requests"] += 1
+            worker, request = self._send(request_id)
+        # Sent outside the pool lock: a large request can block until the worker drains its pipe
+        try:
+            with worker["send_lock"]:
+                worker["conn"].send(request)
+        except OSError:
+            pass  # The worker died; the collector restarts it and resends its requests
+        return request_id, future
+
+    def score(self, pairs: list, model_name: str, batch_size: int = 16) -> list:
+        """
+        Splits the pairs across the workers and waits up to timeout_s for all chunks together.
+        Timed-out or failed chunks come back as error results, like an in-process scoring failure.
+        """
+        chunk_size = max(batch_size, math.ceil(len(pairs) / self.processes))
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        deadline = time.monotonic() + self.timeout_s
+        submitted = [self._submit(chunk, model_name, batch_size) for chunk in chunks]
+
+        results = []
+        for chunk, (request_id, future) in zip(chunks, submitted):
+            try:
+                results.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except TimeoutError:
+                self._abandon(request_id)
+                results.extend({"error": f"COMET worker timed out after {self.timeout_s}s", "comet_score": None} for _ in chunk)
+            except Exception as e:
+                results.extend({"error": str(e), "comet_score": None} for _ in chunk)
+        return results
+
+    def _abandon(self, request_id: int):
+        # Only this caller gives up. The request may still be queued behind another caller's batch, so
+        # the worker is left alone; _collect kills it only if the request itself runs past timeout_s.
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            self._stats["timeouts"] += 1
+            if entry is None or entry["slot"] is None:
+                return
+            self._workers[entry["slot"]]["in_flight"].discard(request_id)
+
+    def _mark_started(self, slot: int, request_id: int):
+        with self._lock:
+            self._workers[slot]["current"] = (request_id, time.monotonic())
+
+    def _resolve(self, slot: int, request_id: int, ok: bool, payload):
+        with self._lock:
+            self._workers[slot]["current"] = None
+            entry = self._pending.pop(request_id, None)
+            if entry is None:
+                return
+            self._workers[entry["slot"]]["in_flight"].discard(request_id)
+            self._rapid_failures[entry["slot"]] = 0
+            self._stats["completed" if ok else "errors"] += 1
+        if ok:
+            entry["future"].set_result(payload)
+        else:
+            entry["future"].set_exception(RuntimeError(payload))
+
+    def _replace_worker(self, slot: int):
+        resend = []
+        with self._lock:
+            if self._closed:
+                return
+            worker = self._workers[slot]
+            self._stats["crashes"] += 1
+            worker["conn"].close()
+            orphaned = worker["in_flight"]
+            self._start_worker(slot)
+            self._stats["restarts"] += 1
+            for request_id in orphaned:
+                entry = self._pending.get(request_id)
+                if entry is None:
+                    continue
+                if entry["retried"]:
+                    self._pending.pop(request_id)
+                    entry["future"].set_exception(RuntimeError("COMET worker crashed twice on this request"))
+                    continue
+                entry["retried"] = True
+                self._stats["retried"] += 1
+                resend.append(self._send(request_id))
+        print(f"Restarted COMET worker {slot}; retrying {len(resend)} queued requests")
+        for worker, request in resend:
+            try:
+                with worker["send_lock"]:
+                    worker["conn"].send(request)
+            except OSError:
+                pass
+
+    def _collect(self):
+        while not self._closed:
+            with self._lock:
+                connections = {worker["conn"]: slot for slot, worker in enumerate(self._workers)}
+            for conn in wait(list(connections), timeout=0.5):
+                try:
+                    request_id, ok, payload = conn.recv()
+                except (EOFError, OSError):
+                    continue  # The liveness check below replaces the worker
+                if ok is None:
+                    self._mark_started(connections[conn], request_id)
+                else:
+                    self._resolve(connections[conn], request_id, ok, payload)
+            now = time.monotonic()
+            for slot, worker in enumerate(list(self._workers)):
+                if worker["process"].is_alive():
+                    current = worker["current"]
+                    if current is not None and now - current[1] > self.timeout_s:
+                        # Hung on one request; killing it lets the liveness check restart the worker
+                        print(f"COMET request {current[0]} ran past {self.timeout_s}s; restarting worker {slot}")
+                        worker["current"] = None
+                        worker["process"].kill()
+                    continue
+                if not self._restart_at[slot]:
+                    if now - worker["started_at"] < WORKER_RAPID_FAILURE_SECONDS:
+                        self._rapid_failures[slot] += 1
+                    delay = min(WORKER_RESTART_BACKOFF_MAX_SECONDS, 0.5 * 2 ** self._rapid_failures[slot]) if self._rapid_failures[slot] else 0
+                    self._restart_at[slot] = now + delay
+                if now >= self._restart_at[slot]:
+                    self._restart_at[slot] = 0.0
+                    self._replace_worker(slot)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "processes": self.processes,
+                "alive": sum(worker["process"].is_alive() for worker in self._workers),
+                "in_flight": {slot: len(worker["in_flight"]) for slot, worker in enumerate(self._workers)},
+                "timeout_s": self.timeout_s,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                with worker["send_lock"]:
+                    worker["conn"].send(None)
+            except OSError:
+                pass
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].kill()
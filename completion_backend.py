@@ -0,0 +1,316 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+
+from llm_client import get_async_groq_client, get_async_openai_client, get_background_loop, run_on_background_loop
+
+# Providers a completion can be sent to. Set <NAME>_BASE_URL (e.g. GROQ_BASE_URL, GEMINI_BASE_URL)
+# to point a backend at another endpoint, such as a local stub server in tests.
+COMPLETION_BACKENDS = {
+    "groq": {"kind": "groq", "api_key_name": "GROQ_API_KEY", "base_url": None},
+    "gemini": {"kind": "openai", "api_key_name": "GEMINI_API_KEY", "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/"},
+}
+
+# Ordered (backend, model) targets per caller. The first is the primary; the rest are used as the
+# hedge and, on errors, as failover targets. A model of None keeps the model the caller asked for.
+# e.g. "judge": [("groq", None), ("gemini", "gemini-2.5-flash")]
+COMPLETION_ROUTES = {
+    "judge": [("groq", None)],
+    "chat": [("groq", None)],
+    "prompt_engineered": [("gemini", None)],
+    "cascade": [("gemini", None)],
+}
+
+# When a route has a second target, it is started once the primary has gone longer than the
+# primary's recent `quantile` latency without a response (or first streamed chunk). Whichever
+# answers first wins and the other request is cancelled.
+HEDGE_POLICY = {
+    "enabled": True,
+    "quantile": 0.95,
+    # Until a backend has this many samples the default deadline is used
+    "min_samples": 20,
+    "default_deadline_s": {"response": 30.0, "first_token": 5.0},
+    "min_deadline_s": 0.25,
+    "max_deadline_s": 60.0,
+    # Duplicate requests started per call at most (failover on errors is not limited by this)
+    "max_hedges": 1,
+}
+
+LATENCY_BUCKETS_S = [0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: list = LATENCY_BUCKETS_S):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float):
+        """
+        Estimated q-quantile, interpolated linearly inside the bucket it falls in
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            cumulative = 0
+            for index, count in enumerate(self.counts):
+                if count and cumulative + count >= target:
+                    lower = self.buckets[index - 1] if index else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.max
+                    return min(self.max, lower + (upper - lower) * (target - cumulative) / count)
+                cumulative += count
+            return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total, maximum = self.count, self.total, self.max
+        labels = [f"<={bound}s" for bound in self.buckets] + [f">{self.buckets[-1]}s"]
+        return {
+            "count": count,
+            "mean_s": round(total / count, 3) if count else None,
+            "p50_s": _round(self.quantile(0.5)),
+            "p95_s": _round(self.quantile(0.95)),
+            "p99_s": _round(self.quantile(0.99)),
+            "max_s": round(maximum, 3),
+            "buckets": {label: n for label, n in zip(labels, counts) if n},
+        }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+_histograms = {}  # (target, "response" | "first_token") -> LatencyHistogram
+_stats = {}  # target -> counters
+_stats_lock = threading.Lock()
+
+
+def _histogram(target: str, kind: str) -> LatencyHistogram:
+    with _stats_lock:
+        return _histograms.setdefault((target, kind), LatencyHistogram())
+
+
+def _record(target: str, key: str):
+    with _stats_lock:
+        stats = _stats.setdefault(target, {"requests": 0, "errors": 0, "wins": 0, "hedges_fired": 0, "hedge_wins": 0, "failovers": 0, "cancelled": 0, "censored": 0})
+        stats[key] += 1
+
+
+def backend_stats() -> dict:
+    """
+    Per-target (backend:model) request counters and latency histograms. hedges_fired counts the
+    times this target was the slow primary; hedge_wins the times it won as the duplicate request.
+    censored counts cancelled requests whose elapsed time was recorded as a latency sample.
+    """
+    with _stats_lock:
+        stats = {target: dict(counters) for target, counters in _stats.items()}
+        histograms = dict(_histograms)
+    for (target, kind), histogram in histograms.items():
+        stats.setdefault(target, {})[f"{kind}_latency"] = histogram.snapshot()
+    return stats
+
+
+def _base_url(name: str) -> str:
+    return os.environ.get(f"{name.upper()}_BASE_URL") or COMPLETION_BACKENDS[name]["base_url"]
+
+
+def _client(name: str):
+    backend = COMPLETION_BACKENDS[name]
+    if backend["kind"] == "groq":
+        return get_async_groq_client(_base_url(name))
+    return get_async_openai_client(backend["api_key_name"], _base_url(name))
+
+
+def _targets(route: str, model: str) -> list:
+    return [(backend, target_model or model) for backend, target_model in COMPLETION_ROUTES[route]]
+
+
+def primary_target(route: str, model: str = None) -> str:
+    """
+    "backend:model" of the route's first target, the one callers key and label results by
+    """
+    backend, target_model = _targets(route, model)[0]
+    return f"{backend}:{target_model}"
+
+
+def _hedge_deadline(target: str, kind: str, policy: dict) -> float:
+    histogram = _histogram(target, kind)
+    deadline = histogram.quantile(policy["quantile"]) if histogram.count >= policy["min_samples"] else None
+    if deadline is None:
+        deadline = policy["default_deadline_s"][kind]
+    return min(policy["max_deadline_s"], max(policy["min_deadline_s"], deadline))
+
+
+async def _request(backend: str, model: str, messages: list, stream: bool, params: dict, censor_after: float):
+    """
+    One request to one target. For streams, waits for the first chunk and returns (stream, first_chunk).
+    A request cancelled after censor_after seconds (it lost the race or the call was abandoned) still
+    counts its elapsed time, a lower bound on its latency, so lost races don't bias the deadline low.
+    """
+    target = f"{backend}:{model}"
+    kind = "first_token" if stream else "response"
+    _record(target, "requests")
+    started = time.perf_counter()
+    try:
+        response = await _client(backend).chat.completions.create(model=model, messages=messages, stream=stream, **params)
+        if not stream:
+            _histogram(target, kind).observe(time.perf_counter() - started)
+            return response
+        try:
+            first_chunk = await response.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+        except BaseException:
+            await response.close()
+            raise
+        _histogram(target, kind).observe(time.perf_counter() - started)
+        return response, first_chunk
+    except asyncio.CancelledError:
+        _record(target, "cancelled")
+        elapsed = time.perf_counter() - started
+        if elapsed >= censor_after:
+            _histogram(target, kind).observe(elapsed)
+            _record(target, "censored")
+        raise
+    except Exception:
+        _record(target, "errors")
+        raise
+
+
+async def _discard(task: asyncio.Task, stream: bool):
+    # Cancels a losing request; a stream that had already started is closed
+    task.cancel()
+    try:
+        result = await task
+    except BaseException:
+        return
+    if stream:
+        await result[0].close()
+
+
+async def _race(route: str, model: str, messages: list, stream: bool, policy: dict, params: dict):
+    targets = _targets(route, model)
+    kind = "first_token" if stream else "response"
+    hedge_at = time.perf_counter() + _hedge_deadline(f"{targets[0][0]}:{targets[0][1]}", kind, policy)
+    pending = {}  # task -> target index
+    next_index = 0
+    hedges = 0
+    last_error = None
+
+    def start_next():
+        nonlocal next_index
+        backend, target_model = targets[next_index]
+        censor_after = _hedge_deadline(f"{backend}:{target_model}", kind, policy)
+        task = asyncio.create_task(_request(backend, target_model, messages, stream, params, censor_after))
+        pending[task] = next_index
+        next_index += 1
+
+    start_next()
+    try:
+        while pending:
+            can_hedge = policy.get("enabled") and hedges < policy["max_hedges"] and next_index < len(targets)
+            timeout = max(0.0, hedge_at - time.perf_counter()) if can_hedge else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                _record(f"{targets[0][0]}:{targets[0][1]}", "hedges_fired")
+                hedges += 1
+                start_next()
+                continue
+            for task in done:
+                index = pending.pop(task)
+                backend, target_model = targets[index]
+                if task.exception() is None:
+                    _record(f"{backend}:{target_model}", "wins")
+                    if index and hedges and index <= hedges:
+                        _record(f"{backend}:{target_model}", "hedge_wins")
+                    for loser in list(pending):
+                        pending.pop(loser)
+                        await _discard(loser, stream)
+                    for other in done - {task}:
+                        if other.exception() is None and stream:
+                            await other.result()[0].close()
+                    return task.result(), f"{backend}:{target_model}"
+                last_error = task.exception()
+                print(f"Completion from {backend}:{target_model} failed: {last_error}")
+            if not pending and next_index < len(targets):
+                _record(f"{targets[next_index][0]}:{targets[next_index][1]}", "failovers")
+                start_next()
+    finally:
+        for task in pending:
+            await _discard(task, stream)
+    raise last_error
+
+
+async def complete_async(route: str, messages: list, model: str = None, hedge_policy: dict = None, served_by: list = None, **params):
+    """
+    Chat completion through the route's backends with hedging and failover. Extra keyword
+    arguments (temperature, max_completion_tokens, tools, ...) are passed to every backend.
+    When served_by is a list, the "backend:model" that answered is appended to it.
+    """
+    response, target = await _race(route, model, messages, False, hedge_policy or HEDGE_POLICY, params)
+    if served_by is not None:
+        served_by.append(target)
+    return response
+
+
+async def stream_completion_async(route: str, messages: list, model: str = None, hedge_policy: dict = None, **params):
+    """
+    Streaming chat completion; the hedge race is decided by the first chunk, then the winning
+    stream is passed through unchanged
+    """
+    (stream, first_chunk), _ = await _race(route, model, messages, True, hedge_policy or HEDGE_POLICY, params)
+    try:
+        if first_chunk is not None:
+            yield first_chunk
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.close()
+
+
+def complete(route: str, messages: list, model: str = None, hedge_policy: dict = None, served_by: list = None, **params):
+    """
+    Blocking complete_async for Streamlit and thread-pool callers
+    """
+    return run_on_background_loop(complete_async(route, messages, model, hedge_policy, served_by, **params))
+
+
+async def _next_chunk(chunks):
+    # A coroutine raising StopAsyncIteration can't cross into a concurrent Future, so signal the end with None
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def stream_completion(route: str, messages: list, model: str = None, hedge_policy: dict = None, **params):
+    """
+    Blocking iterator over stream_completion_async; the stream runs on the background loop.
+    The underlying stream is closed once the iterator is exhausted, closed or garbage-collected.
+    """
+    loop = get_background_loop()
+    chunks = stream_completion_async(route, messages, model, hedge_policy, **params)
+    try:
+        while True:
+            chunk = asyncio.run_coroutine_threadsafe(_next_chunk(chunks), loop).result()
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Not waited on: a generator abandoned mid-stream may only be finalized at interpreter exit,
+        # when the loop thread is gone
+        asyncio.run_coroutine_threadsafe(chunks.aclose(), loop)
@@ -0,0 +1,351 @@
+import asyncio
+import math
+import re
+import sys
+import time
+
+from tools import (
+    CRITERIA,
+    SCORE_LABELS,
+    _merge_usage,
+    count_llm_calls,
+    evaluate_translations_async,
+    map_sum_to_score,
+    predict_translation_quality_batch,
+)
+from llm_client import run_on_background_loop
+
+# Long inputs are split into paragraphs and then sentences, aligned by length, and every distinct
+# segment pair is judged once through the normal reflection pipeline (gated by its COMET-QE score).
+DOCUMENT_SEGMENT_UNIT = "sentence"  # or "paragraph"
+DOCUMENT_MAX_CONCURRENCY = 16
+# The fast path switches to document mode for sources longer than this or with several paragraphs
+DOCUMENT_MODE_MIN_CHARS = 600
+# A document passes a criterion when segments covering at least this share of the source pass it
+DOCUMENT_CRITERION_MIN_PASS_RATE = 0.9
+DOCUMENT_MAX_HIGHLIGHTS = 10
+
+# Gale-Church length-based alignment. Filipino renderings run ~20% longer than the English source.
+ALIGNMENT_LENGTH_RATIO = 1.2
+ALIGNMENT_VARIANCE = 6.8
+ALIGNMENT_PRIORS = {(1, 1): 0.89, (1, 0): 0.005, (0, 1): 0.005, (2, 1): 0.0445, (1, 2): 0.0445, (2, 2): 0.011}
+# Omissions and additions also pay this cost per (source-equivalent) character left unaligned, so
+# dropping a long part costs more than dropping a short one. Capped below the cost of a wildly
+# mismatched merge, so a long dropped paragraph is still an omission.
+ALIGNMENT_UNALIGNED_COST_PER_CHAR = 0.02
+ALIGNMENT_UNALIGNED_MAX_COST = 10.0
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])[\"”’)\]]*\s+(?=[\"“‘(\[]?[A-Z0-9ÁÉÍÑÓÚ])")
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "jr.", "sr.", "no.", "vs.", "etc.", "e.g.", "i.e.", "gng.", "bb.", "g.", "sto.", "sta."}
+
+
+def is_document(source_en: str) -> bool:
+    return len(source_en) >= DOCUMENT_MODE_MIN_CHARS or len(split_paragraphs(source_en)) > 1
+
+
+def split_paragraphs(text: str) -> list:
+    return [paragraph.strip() for paragraph in _PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+
+
+def split_sentences(text: str) -> list:
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        piece = text[start:match.start()]
+        last_word = piece.rsplit(None, 1)[-1].lower() if piece.strip() else ""
+        # Keep abbreviations and initials ("Dr.", "J.") attached to the following words
+        if last_word in _ABBREVIATIONS or re.fullmatch(r"\w\.", last_word):
+            continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def _bead_cost(source_chars: int, candidate_chars: int, bead: tuple) -> float:
+    if not source_chars or not candidate_chars:
+        # The length model always scores an empty side as wildly off, which would merge a dropped
+        # paragraph into its neighbour; omissions and additions pay their prior plus a milder linear cost
+        unaligned_chars = source_chars + candidate_chars / ALIGNMENT_LENGTH_RATIO
+        length_cost = min(ALIGNMENT_UNALIGNED_MAX_COST, ALIGNMENT_UNALIGNED_COST_PER_CHAR * unaligned_chars)
+        return length_cost - math.log(ALIGNMENT_PRIORS[bead])
+    mean = max(1.0, (source_chars + candidate_chars / ALIGNMENT_LENGTH_RATIO) / 2)
+    delta = (candidate_chars - source_chars * ALIGNMENT_LENGTH_RATIO) / math.sqrt(mean * ALIGNMENT_VARIANCE)
+    probability = 2 * (1 - 0.5 * (1 + math.erf(abs(delta) / math.sqrt(2))))
+    return -math.log(max(probability, 1e-12)) - math.log(ALIGNMENT_PRIORS[bead])
+
+
+def align(source_parts: list, candidate_parts: list) -> list:
+    """
+    Gale-Church alignment of two lists of text parts. Returns beads as (source indices, candidate
+    indices); a bead with an empty side is an omission or an addition.
+    """
+    n, m = len(source_parts), len(candidate_parts)
+    costs = {(0, 0): (0.0, None)}
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if (i, j) == (0, 0):
+                continue
+            best = None
+            for di, dj in ALIGNMENT_PRIORS:
+                if i < di or j < dj or (i - di, j - dj) not in costs:
+                    continue
+                source_chars = sum(len(part) for part in source_parts[i - di:i])
+                candidate_chars = sum(len(part) for part in candidate_parts[j - dj:j])
+                cost = costs[(i - di, j - dj)][0] + _bead_cost(source_chars, candidate_chars, (di, dj))
+                if best is None or cost < best[0]:
+                    best = (cost, (di, dj))
+            if best is not None:
+                costs[(i, j)] = best
+
+    beads = []
+    i, j = n, m
+    while (i, j) != (0, 0):
+        di, dj = costs[(i, j)][1]
+        beads.append((list(range(i - di, i)), list(range(j - dj, j))))
+        i, j = i - di, j - dj
+    return beads[::-1]
+
+
+def _counterparts(beads: list, source_ids: list) -> list:
+    # Other-side indices of every bead that shares a source index with source_ids
+    return sorted({j for bead_source_ids, bead_other_ids in beads if set(bead_source_ids) & set(source_ids) for j in bead_other_ids})
+
+
+def segment_document(source_en: str, candidate_fil: str, unit: str = None, reference_fil: str = "") -> list:
+    """
+    Splits and aligns a document pair. Paragraphs are aligned first; with unit="sentence" the
+    sentences inside each aligned paragraph group are aligned next. A reference is aligned to the
+    source the same way and each segment gets the reference parts aligned to its source.
+    """
+    unit = unit or DOCUMENT_SEGMENT_UNIT
+    source_paragraphs = split_paragraphs(source_en)
+    candidate_paragraphs = split_paragraphs(candidate_fil)
+    reference_paragraphs = split_paragraphs(reference_fil or "")
+    reference_beads = align(source_paragraphs, reference_paragraphs) if reference_paragraphs else []
+    segments = []
+    for source_ids, candidate_ids in align(source_paragraphs, candidate_paragraphs):
+        source_group = [source_paragraphs[i] for i in source_ids]
+        candidate_group = [candidate_paragraphs[j] for j in candidate_ids]
+        reference_group = [reference_paragraphs[k] for k in _counterparts(reference_beads, source_ids)]
+        if unit == "paragraph" or not source_group or not candidate_group:
+            segments.append({
+                "source_en": "\n\n".join(source_group),
+                "candidate_fil": "\n\n".join(candidate_group),
+                "reference_fil": "\n\n".join(reference_group),
+            })
+            continue
+        source_sentences = [sentence for paragraph in source_group for sentence in split_sentences(paragraph)]
+        candidate_sentences = [sentence for paragraph in candidate_group for sentence in split_sentences(paragraph)]
+        reference_sentences = [sentence for paragraph in reference_group for sentence in split_sentences(paragraph)]
+        sentence_reference_beads = align(source_sentences, reference_sentences) if reference_sentences else []
+        for sentence_source_ids, sentence_candidate_ids in align(source_sentences, candidate_sentences):
+            segments.append({
+                "source_en": " ".join(source_sentences[i] for i in sentence_source_ids),
+                "candidate_fil": " ".join(candidate_sentences[j] for j in sentence_candidate_ids),
+                "reference_fil": " ".join(reference_sentences[k] for k in _counterparts(sentence_reference_beads, sentence_source_ids)),
+            })
+    for index, segment in enumerate(segments):
+        segment["index"] = index
+    return segments
+
+
+def _segment_key(segment: dict) -> tuple:
+    return tuple(" ".join(segment[key].split()) for key in ("source_en", "candidate_fil", "reference_fil"))
+
+
+def _unaligned_evaluation(segment: dict) -> dict:
+    # No counterpart on one side: an omission fails Completeness and Accuracy, an addition Accuracy and Coherence
+    if not segment["candidate_fil"]:
+        failed = {"Completeness", "Accuracy"}
+        criterion, explanation = "Completeness", "Source segment has no counterpart in the translation."
+    else:
+        failed = {"Accuracy", "Coherence"}
+        criterion, explanation = "Accuracy", "Translation segment has no counterpart in the source."
+    sum_of_criteria = len(CRITERIA) - len(failed)
+    score = map_sum_to_score(sum_of_criteria)
+    return {
+        "score": score,
+        "sum_of_criteria": sum_of_criteria,
+        "label": SCORE_LABELS[score],
+        "criteria": {name: {"point": int(name not in failed), "reason": explanation if name in failed else ""} for name in CRITERIA},
+        "highlights": [{"criterion": criterion, "source_span": segment["source_en"], "candidate_span": segment["candidate_fil"], "explanation": explanation}],
+        "suggested_fix": "",
+    }
+
+
+def _criterion_point(evaluation: dict, criterion: str):
+    value = (evaluation.get("criteria") or {}).get(criterion)
+    return value.get("point") if isinstance(value, dict) else value
+
+
+def aggregate_segments(segments: list) -> dict:
+    """
+    Document-level evaluation in the usual schema. Criteria pass rates, the mean segment score and
+    the COMET-QE score are weighted by segment length; failing segments are listed per criterion.
+    """
+    scored = [segment for segment in segments if segment.get("final_evaluation")]
+    if not scored:
+        return {"error": "No segment could be evaluated"}
+    weights = [len(segment["source_en"]) or len(segment["candidate_fil"]) or 1 for segment in scored]
+    total_weight = sum(weights)
+
+    criteria = {}
+    for criterion in CRITERIA:
+        failing = [segment["index"] for segment in scored if _criterion_point(segment["final_evaluation"], criterion) == 0]
+        pass_rate = sum(
+            weight for segment, weight in zip(scored, weights) if _criterion_point(segment["final_evaluation"], criterion) != 0
+        ) / total_weight
+        reason = f"Met by {pass_rate:.0%} of the document"
+        if failing:
+            reason += f"; fails in segments {', '.join(map(str, failing[:10]))}" + (" and more" if len(failing) > 10 else "")
+        criteria[criterion] = {"point": int(pass_rate >= DOCUMENT_CRITERION_MIN_PASS_RATE), "reason": reason + ".", "pass_rate": round(pass_rate, 3)}
+    sum_of_criteria = sum(value["point"] for value in criteria.values())
+    score = map_sum_to_score(sum_of_criteria)
+
+    highlights = []
+    for segment in sorted(scored, key=lambda segment: (segment["final_evaluation"].get("score") or 0, segment["index"])):
+        for highlight in segment["final_evaluation"].get("highlights") or []:
+            if isinstance(highlight, dict) and len(highlights) < DOCUMENT_MAX_HIGHLIGHTS:
+                highlights.append({"segment": segment["index"], **highlight})
+
+    comet = [(segment["comet_score"], weight) for segment, weight in zip(scored, weights) if segment.get("comet_score") is not None]
+    confidence = [(segment["final_evaluation"]["confidence"], weight) for segment, weight in zip(scored, weights) if isinstance(segment["final_evaluation"].get("confidence"), (int, float))]
+    return {
+        "score": score,
+        "sum_of_criteria": sum_of_criteria,
+        "label": SCORE_LABELS[score],
+        "criteria": criteria,
+        "highlights": highlights,
+        "suggested_fix": "",
+        "confidence": round(sum(c * w for c, w in confidence) / sum(w for _, w in confidence)) if confidence else None,
+        "mean_segment_score": round(sum((segment["final_evaluation"].get("score") or 0) * weight for segment, weight in zip(scored, weights)) / total_weight, 3),
+        "comet_score": round(sum(c * w for c, w in comet) / sum(w for _, w in comet), 4) if comet else None,
+    }
+
+
+async def evaluate_document_async(
+    source_en,
+    candidate_fil,
+    reference_fil="",
+    domain_guidelines="",
+    unit=None,
+    use_cache=True,
+    use_comet=True,
+    max_concurrency=None,
+    **options
+):
+    """
+    Evaluates a multi-sentence or multi-paragraph translation segment by segment. Repeated segment
+    pairs are judged once. Extra keyword options (schema, early_exit_policy, ...) apply to every
+    segment's reflection pipeline.
+    """
+    started = time.perf_counter()
+    segments = segment_document(source_en, candidate_fil, unit, reference_fil)
+
+    unique = {}  # (source, candidate) -> index of the first segment with that pair
+    for segment in segments:
+        if not segment["source_en"] or not segment["candidate_fil"]:
+            continue
+        first = unique.setdefault(_segment_key(segment), segment["index"])
+        if first != segment["index"]:
+            segment["duplicate_of"] = first
+    to_judge = [segments[index] for index in unique.values()]
+
+    comet_scores = [None] * len(to_judge)
+    if use_comet and to_judge:
+        # COMET runs first so its score can gate each segment's reflection stages
+        comet_results = await asyncio.to_thread(
+            predict_translation_quality_batch, [(segment["source_en"], segment["candidate_fil"]) for segment in to_judge], use_cache=use_cache
+        )
+        comet_scores = [result.get("comet_score") for result in comet_results]
+    results = await evaluate_translations_async(
+        [
+            {
+                "source_en": segment["source_en"],
+                "candidate_fil": segment["candidate_fil"],
+                "reference_fil": segment["reference_fil"],
+                "domain_guidelines": domain_guidelines,
+                "comet_score": comet_score,
+            }
+            for segment, comet_score in zip(to_judge, comet_scores)
+        ],
+        max_concurrency=max_concurrency or DOCUMENT_MAX_CONCURRENCY,
+        use_cache=use_cache,
+        **options
+    )
+
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    llm_calls = 0
+    judged = {}
+    for segment, comet_score, result in zip(to_judge, comet_scores, results):
+        _merge_usage(usage, result.get("usage") or {})
+        llm_calls += count_llm_calls("evaluate_translation", result)
+        judged[segment["index"]] = (comet_score, result)
+
+    for segment in segments:
+        if not segment["source_en"] or not segment["candidate_fil"]:
+            segment["final_evaluation"] = _unaligned_evaluation(segment)
+            segment["alignment"] = "omission" if segment["source_en"] else "addition"
+            continue
+        segment["comet_score"], result = judged[segment.get("duplicate_of", segment["index"])]
+        if "error" in result:
+            segment["error"] = result["error"]
+            continue
+        segment["final_evaluation"] = result["final_evaluation"]
+        segment["reflection_triggered"] = result.get("reflection_triggered", False)
+        segment["pipeline_path"] = result.get("pipeline_path")
+
+    return {
+        "document_evaluation": aggregate_segments(segments),
+        "segments": segments,
+        "unit": unit or DOCUMENT_SEGMENT_UNIT,
+        "segment_count": len(segments),
+        "judged_segments": len(to_judge),
+        "duplicate_segments": sum("duplicate_of" in segment for segment in segments),
+        "unaligned_segments": sum("alignment" in segment for segment in segments),
+        "failed_segments": sum("error" in segment for segment in segments),
+        "usage": usage,
+        "llm_calls": llm_calls,
+        "latency_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def evaluate_document(source_en, candidate_fil, reference_fil="", domain_guidelines="", unit=None, use_cache=True, use_comet=True, **options):
+    """
+    Evaluates a long translation segment by segment and aggregates a document-level score
+    """
+    return run_on_background_loop(
+        evaluate_document_async(source_en, candidate_fil, reference_fil, domain_guidelines, unit, use_cache, use_comet, **options)
+    )
+
+
+# (source part lengths, candidate part lengths, expected beads) for check_alignment
+ALIGNMENT_REGRESSION_CASES = [
+    # Three source paragraphs, the last one untranslated and the second rendered short: the
+    # third must be the omission, not the second with the third aligned to its translation
+    ([300, 400, 330], [360, 420], [([0], [0]), ([1], [1]), ([2], [])]),
+    # A long dropped paragraph is an omission, not merged into its neighbour
+    ([300, 2000, 300], [360, 360], [([0], [0]), ([1], []), ([2], [1])]),
+    # A dropped sentence among short ones
+    ([120, 80, 150, 90], [145, 180, 110], [([0], [0]), ([1], []), ([2], [1]), ([3], [2])]),
+]
+
+
+def check_alignment() -> int:
+    """
+    Runs align() over ALIGNMENT_REGRESSION_CASES; returns the number of mismatches
+    """
+    failures = 0
+    for source_lengths, candidate_lengths, expected in ALIGNMENT_REGRESSION_CASES:
+        beads = align(["s" * length for length in source_lengths], ["c" * length for length in candidate_lengths])
+        if beads != expected:
+            failures += 1
+            print(f"align({source_lengths}, {candidate_lengths}) returned {beads}, expected {expected}")
+    print(f"{len(ALIGNMENT_REGRESSION_CASES) - failures}/{len(ALIGNMENT_REGRESSION_CASES)} alignment cases passed")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_alignment() else 0)
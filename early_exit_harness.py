@@ -0,0 +1,138 @@
+"""
+Offline harness for the early-exit gate.
+
+Usage:
+    python early_exit_harness.py labelled.jsonl --min-confidence 80 90 95 --comet
+
+Runs the full three-stage pipeline once per row, then replays the gate over each row's initial
+evaluation for every policy setting. Reports the LLM calls the gate would save and how often the
+gated verdict agrees with the full pipeline (and with gold_score, when the set has one).
+With --schema compact the gate sees the raw model output (raw_initial_evaluation), as it does live,
+not the normalized evaluation.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from tools import (
+    EARLY_EXIT_POLICY,
+    early_exit_decision,
+    evaluate_translations_async,
+    predict_translation_quality_batch,
+)
+
+
+def load_rows(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def full_pipeline_calls(result: dict) -> int:
+    return 3 if result.get("reflection_triggered") else 2
+
+
+def replay_policy(rows: list, results: list, policy: dict) -> dict:
+    evaluated = 0
+    exits = 0
+    full_calls = 0
+    gated_calls = 0
+    agree_score = 0
+    agree_label = 0
+    gold_total = 0
+    gold_full = 0
+    gold_gated = 0
+
+    for row, result in zip(rows, results):
+        if "error" in result:
+            continue
+        evaluated += 1
+        initial = result["initial_evaluation"]
+        final = result["final_evaluation"]
+        skip, _ = early_exit_decision(result.get("raw_initial_evaluation", initial), row.get("comet_score"), policy)
+
+        calls = full_pipeline_calls(result)
+        full_calls += calls
+        gated = initial if skip else final
+        if skip:
+            exits += 1
+            gated_calls += 1
+        else:
+            gated_calls += calls
+
+        agree_score += gated.get("score") == final.get("score")
+        agree_label += str(gated.get("label", "")).lower() == str(final.get("label", "")).lower()
+        if row.get("gold_score") is not None:
+            gold_total += 1
+            gold_full += final.get("score") == row["gold_score"]
+            gold_gated += gated.get("score") == row["gold_score"]
+
+    return {
+        "policy": policy,
+        "evaluated": evaluated,
+        "early_exit_rate": exits / evaluated if evaluated else 0.0,
+        "llm_calls_full": full_calls,
+        "llm_calls_gated": gated_calls,
+        "llm_calls_saved": full_calls - gated_calls,
+        "llm_calls_saved_pct": (full_calls - gated_calls) / full_calls if full_calls else 0.0,
+        "score_agreement_with_full": agree_score / evaluated if evaluated else 0.0,
+        "label_agreement_with_full": agree_label / evaluated if evaluated else 0.0,
+        "gold_accuracy_full": gold_full / gold_total if gold_total else None,
+        "gold_accuracy_gated": gold_gated / gold_total if gold_total else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure calls saved vs. agreement for the early-exit gate.")
+    parser.add_argument("input", help="Labelled JSONL with source_en, candidate_fil and optional reference_fil, domain_guidelines, comet_score, gold_score")
+    parser.add_argument("--min-confidence", type=float, nargs="+", default=[80, 90, 95])
+    parser.add_argument("--comet", action="store_true", help="Score rows without a comet_score using COMET-QE")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--schema", choices=["full", "compact"], default=None, help="Output schema of the baseline runs")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run rows even if a cached result exists")
+    parser.add_argument("--output", help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    rows = load_rows(args.input)
+    if args.comet:
+        missing = [row for row in rows if row.get("comet_score") is None]
+        scored = predict_translation_quality_batch([(row["source_en"], row["candidate_fil"]) for row in missing])
+        for row, comet in zip(missing, scored):
+            row["comet_score"] = comet.get("comet_score")
+
+    # The baseline is always the full pipeline; each policy is replayed over its initial evaluations
+    results = asyncio.run(
+        evaluate_translations_async(
+            rows,
+            max_concurrency=args.concurrency,
+            early_exit_policy={**EARLY_EXIT_POLICY, "enabled": False},
+            schema=args.schema,
+            use_cache=not args.no_cache,
+        )
+    )
+    if args.schema == "compact":
+        stale = sum("error" not in result and "raw_initial_evaluation" not in result for result in results)
+        if stale:
+            print(f"{stale} cached results predate raw_initial_evaluation and are replayed over the normalized evaluation; rerun with --no-cache")
+
+    reports = []
+    print(f"{'min_conf':>8} {'exit_rate':>9} {'calls_saved':>11} {'score_agree':>11} {'label_agree':>11} {'gold_full':>9} {'gold_gated':>10}")
+    for min_confidence in args.min_confidence:
+        policy = {**EARLY_EXIT_POLICY, "enabled": True, "min_confidence": min_confidence}
+        report = replay_policy(rows, results, policy)
+        reports.append(report)
+        gold_full = "-" if report["gold_accuracy_full"] is None else f"{report['gold_accuracy_full']:.3f}"
+        gold_gated = "-" if report["gold_accuracy_gated"] is None else f"{report['gold_accuracy_gated']:.3f}"
+        print(
+            f"{min_confidence:>8.0f} {report['early_exit_rate']:>9.3f} {report['llm_calls_saved_pct']:>11.3f} "
+            f"{report['score_agreement_with_full']:>11.3f} {report['label_agreement_with_full']:>11.3f} {gold_full:>9} {gold_gated:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import (
+    count_llm_calls,
+    evaluate_translation_with_reflection,
+    predict_translation_quality,
+    style_checker,
+)
+from document_mode import evaluate_document, is_document
+
+# Labels a user may put in front of each part of the pair, e.g. "Source: ..." / "Translation: ..."
+_FIELD_LABELS = {
+    "source_en": ["source_en", "source", "english", "original", "en"],
+    "candidate_fil": ["candidate_fil", "candidate", "translation", "filipino", "tagalog", "fil"],
+    "reference_fil": ["reference_fil", "reference", "ref"],
+    "domain_guidelines": ["domain_guidelines", "guidelines", "guideline", "domain"],
+}
+_LABEL_TO_FIELD = {label: field for field, labels in _FIELD_LABELS.items() for label in labels}
+_LABEL_PATTERN = re.compile(
+    r"^\s*(?:\d+[.)]\s*)?(" + "|".join(sorted(map(re.escape, _LABEL_TO_FIELD), key=len, reverse=True)) + r")\s*(?:\([^)]*\))?\s*[:=-]\s*",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def parse_translation_pair(text: str):
+    """
+    Pulls source_en / candidate_fil (and optional reference_fil, domain_guidelines) out of a chat
+    message. Accepts labelled lines ("Source: ...", "Translation: ...") or two plain paragraphs.
+    Returns None when no pair can be found.
+    """
+    matches = list(_LABEL_PATTERN.finditer(text))
+    pair = {}
+    for i, match in enumerate(matches):
+        field = _LABEL_TO_FIELD[match.group(1).lower()]
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        value = text[match.end():end].strip().strip('"“”')
+        if value and field not in pair:
+            pair[field] = value
+
+    if "source_en" not in pair or "candidate_fil" not in pair:
+        paragraphs = [p.strip().strip('"“”') for p in re.split(r"\n\s*\n|\n", text) if p.strip()]
+        if matches or len(paragraphs) != 2:
+            return None
+        pair = {"source_en": paragraphs[0], "candidate_fil": paragraphs[1]}
+
+    pair.setdefault("reference_fil", "")
+    pair.setdefault("domain_guidelines", "")
+    return pair
+
+
+def _timed(fn, **kwargs):
+    started = time.perf_counter()
+    try:
+        result = fn(**kwargs)
+    except Exception as e:
+        result = {"error": str(e)}
+    return result, time.perf_counter() - started
+
+
+def run_fast_path_tools(pair: dict, executor: ThreadPoolExecutor) -> dict:
+    """
+    Runs COMET-QE, the style checker and the reflection evaluator for one pair concurrently.
+    Long documents go through document mode instead, which scores COMET-QE per segment.
+    Returns {tool_name: {"result": ..., "elapsed_s": ...}} plus the LLM calls the tools made.
+    """
+    style_kwargs = {"source_en": pair["source_en"], "candidate_fil": pair["candidate_fil"]}
+    if pair["domain_guidelines"]:
+        style_kwargs["style_guidelines"] = pair["domain_guidelines"]
+
+    if is_document(pair["source_en"]):
+        futures = {
+            "evaluate_style": executor.submit(_timed, style_checker, **style_kwargs),
+            "evaluate_document": executor.submit(
+                _timed,
+                evaluate_document,
+                source_en=pair["source_en"],
+                candidate_fil=pair["candidate_fil"],
+                reference_fil=pair["reference_fil"],
+                domain_guidelines=pair["domain_guidelines"],
+            ),
+        }
+    else:
+        futures = {
+            "predict_translation_quality": executor.submit(
+                _timed, predict_translation_quality, source_en=pair["source_en"], candidate_fil=pair["candidate_fil"]
+            ),
+            "evaluate_style": executor.submit(_timed, style_checker, **style_kwargs),
+            "evaluate_translation": executor.submit(_timed, evaluate_translation_with_reflection, **pair),
+        }
+
+    tool_results = {}
+    llm_calls = 0
+    for tool_name, future in futures.items():
+        result, elapsed = future.result()
+        tool_results[tool_name] = {"result": result, "elapsed_s": elapsed}
+        llm_calls += count_llm_calls(tool_name, result)
+    return {"tools": tool_results, "llm_calls": llm_calls}
+
+
+def build_synthesis_prompt(judge_prompt: str, pair: dict, tool_results: dict) -> str:
+    results = {
+        tool_name: entry["result"] for tool_name, entry in tool_results.items()
+    }
+    # The style checker attaches the relevant manual sections; the summary doesn't need them
+    if isinstance(results.get("evaluate_style"), dict):
+        results["evaluate_style"] = {k: v for k, v in results["evaluate_style"].items() if k != "manual"}
+    # The raw compact-schema output is only kept for replaying the early-exit gate offline
+    if isinstance(results.get("evaluate_translation"), dict):
+        results["evaluate_translation"] = {k: v for k, v in results["evaluate_translation"].items() if k != "raw_initial_evaluation"}
+    # Per-segment detail would repeat the whole document; the aggregate already carries the highlights
+    if isinstance(results.get("evaluate_document"), dict) and "segments" in results["evaluate_document"]:
+        document = results["evaluate_document"]
+        results["evaluate_document"] = {
+            **{k: v for k, v in document.items() if k not in ("segments", "usage")},
+            "segment_scores": [(segment.get("final_evaluation") or {}).get("score") for segment in document["segments"]],
+        }
+    return f"""{judge_prompt}
+The tools have already been run for you. Do not call any tools; write the Evaluation Summary from the results below.
+
+TRANSLATION PAIR:
+{json.dumps(pair, ensure_ascii=False, indent=2)}
+
+TOOL RESULTS:
+{json.dumps(results, ensure_ascii=False, indent=2)}
+"""
@@ -0,0 +1,117 @@
+import json
+
+# Token budget for the conversation resent on every request. The newest HISTORY_RECENT_TURNS turns
+# (a user message and everything answering it) are sent as is; older tool results become score-only
+# stubs, older long user messages (e.g. with the judge prompt appended) keep only their tail, and the
+# oldest turns are dropped if the request is still over budget. The system message is always kept.
+HISTORY_MAX_PROMPT_TOKENS = 24_000
+HISTORY_RECENT_TURNS = 2
+HISTORY_OLD_MESSAGE_MAX_CHARS = 1_500
+# Rough estimate; close enough for budgeting without shipping a tokenizer for every model
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(messages: list) -> int:
+    tokens = 0
+    for message in messages:
+        chars = len(message.get("content") or "")
+        for tool_call in message.get("tool_calls") or []:
+            chars += len(tool_call["function"]["name"]) + len(tool_call["function"]["arguments"])
+        tokens += TOKENS_PER_MESSAGE + chars // CHARS_PER_TOKEN
+    return tokens
+
+
+def summarize_tool_result(name: str, content: str) -> str:
+    """
+    Score-only stub of a tool result for older turns
+    """
+    try:
+        result = json.loads(content)
+    except (TypeError, ValueError):
+        return content[:200]
+    if not isinstance(result, dict):
+        return content[:200]
+
+    if "error" in result:
+        summary = {"error": str(result["error"])[:200]}
+    elif name == "evaluate_translation":
+        final = result.get("final_evaluation") or {}
+        summary = {key: final.get(key) for key in ("score", "label", "sum_of_criteria", "confidence") if key in final}
+        failed = [criterion for criterion, value in (final.get("criteria") or {}).items() if isinstance(value, dict) and value.get("point") == 0]
+        if failed:
+            summary["failed_criteria"] = failed
+    elif name == "evaluate_candidates":
+        candidates = result.get("candidates") or []
+        summary = {
+            "ranking": result.get("ranking"),
+            "scores": [(candidate.get("final_evaluation") or {}).get("score") for candidate in candidates],
+        }
+    elif name == "evaluate_document":
+        document = result.get("document_evaluation") or {}
+        summary = {key: document.get(key) for key in ("score", "label", "sum_of_criteria", "mean_segment_score") if key in document}
+        summary["segments"] = result.get("segment_count")
+        summary["worst_segments"] = sorted({highlight.get("segment") for highlight in document.get("highlights") or []})[:5]
+    elif name == "predict_translation_quality":
+        summary = {key: result.get(key) for key in ("comet_score", "interpretation") if key in result}
+    elif name == "evaluate_style":
+        summary = {key: result.get(key) for key in ("consistency_score", "manual_sections") if key in result}
+    else:
+        summary = {key: value for key, value in result.items() if isinstance(value, (int, float, bool))}
+    return json.dumps({"summary_of_earlier_result": True, **summary}, ensure_ascii=False)
+
+
+def _split_turns(messages: list):
+    system = [message for message in messages[:1] if message["role"] == "system"]
+    turns = []
+    for message in messages[len(system):]:
+        if message["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return system, turns
+
+
+def _compact_turn(turn: list) -> tuple:
+    compacted = []
+    stubbed = 0
+    for message in turn:
+        content = message.get("content") or ""
+        if message["role"] == "tool":
+            message = {**message, "content": summarize_tool_result(message.get("name", ""), content)}
+            stubbed += 1
+        elif message["role"] == "user" and len(content) > HISTORY_OLD_MESSAGE_MAX_CHARS:
+            message = {**message, "content": "[earlier instructions omitted]\n" + content[-HISTORY_OLD_MESSAGE_MAX_CHARS:]}
+        compacted.append(message)
+    return compacted, stubbed
+
+
+def compact_history(messages: list, max_tokens: int = None, recent_turns: int = None) -> tuple:
+    """
+    Returns (messages to send, stats). The session's own message list is left untouched so the
+    full conversation can still be displayed.
+    """
+    max_tokens = HISTORY_MAX_PROMPT_TOKENS if max_tokens is None else max_tokens
+    recent_turns = HISTORY_RECENT_TURNS if recent_turns is None else recent_turns
+
+    system, turns = _split_turns(messages)
+    split = max(len(turns) - max(recent_turns, 1), 0)
+    old_turns, stubbed = [], 0
+    for turn in turns[:split]:
+        compacted, turn_stubbed = _compact_turn(turn)
+        old_turns.append(compacted)
+        stubbed += turn_stubbed
+
+    # Still over budget: drop whole old turns, oldest first, so tool calls keep their results
+    dropped = 0
+    while old_turns and estimate_tokens(system + [m for turn in old_turns + turns[split:] for m in turn]) > max_tokens:
+        old_turns.pop(0)
+        dropped += 1
+
+    compacted_messages = system + [message for turn in old_turns + turns[split:] for message in turn]
+    stats = {
+        "prompt_tokens": estimate_tokens(compacted_messages),
+        "uncompacted_tokens": estimate_tokens(messages),
+        "stubbed_tool_results": stubbed,
+        "dropped_turns": dropped,
+    }
+    return compacted_messages, stats
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# On-disk cache for judge results. Entries expire after CACHE_TTL_SECONDS, and the least
+# recently used entries are pruned once the table grows past CACHE_MAX_ENTRIES.
+CACHE_PATH = ".judge_cache.sqlite3"
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+CACHE_MAX_ENTRIES = 100_000
+CACHE_ENABLED = True
+
+_PRUNE_EVERY_N_WRITES = 500
+
+
+def make_cache_key(namespace: str, inputs: dict, model: str, temperature=None, prompt_version: str = "") -> str:
+    """
+    Content address for a judge call: the inputs plus everything that changes the output
+    """
+    payload = json.dumps(
+        {
+            "namespace": namespace,
+            "inputs": inputs,
+            "model": model,
+            "temperature": temperature,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JudgeCache:
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL only syncs at checkpoints; a crash can lose the latest entries, never corrupt the file
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS judge_cache (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS judge_cache_accessed_at ON judge_cache (accessed_at)")
+        self._conn.commit()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evictions": 0}
+        # Hits only record their access time here; it is written with the next set() so reads stay read-only
+        self._pending_touches = {}  # key -> accessed_at
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM judge_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                # Left for _prune to delete (and count as expired)
+                self._stats["misses"] += 1
+                return None
+            self._pending_touches[key] = now
+            self._stats["hits"] += 1
+        return json.loads(value)
+
+    def set(self, key: str, namespace: str, value):
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_cache (key, namespace, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._conn.commit()
+            self._stats["writes"] += 1
+            if self._stats["writes"] % _PRUNE_EVERY_N_WRITES == 0:
+                self._prune(now)
+
+    def _flush_touches(self):
+        # Caller holds the lock; committed together with the caller's write
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE judge_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+
+    def _prune(self, now: float):
+        # Caller holds the lock
+        expired = self._conn.execute("DELETE FROM judge_cache WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        self._stats["expired"] += expired
+        count = self._conn.execute("SELECT COUNT(*) FROM judge_cache").fetchone()[0]
+        if count > self.max_entries:
+            evicted = self._conn.execute(
+                "DELETE FROM judge_cache WHERE key IN (SELECT key FROM judge_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+            self._stats["evictions"] += evicted
+        self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._pending_touches.clear()
+            self._conn.execute("DELETE FROM judge_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM judge_cache").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["entries"] = entries
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_judge_cache():
+    """
+    Returns the process-wide cache, or None when caching is turned off
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = JudgeCache()
+        return _cache
+
+
+def judge_cache_stats() -> dict:
+    if _cache is None:
+        return {}
+    return _cache.stats()
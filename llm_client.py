@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import streamlit as st
+from groq import AsyncGroq
+
+# Shared HTTP connection pool for every LLM client in the process. Keep-alive connections are
+# reused across tools, reruns and both Streamlit apps instead of paying a TLS handshake per call.
+LLM_POOL_MAX_CONNECTIONS = 50
+LLM_POOL_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_POOL_KEEPALIVE_EXPIRY_SECONDS = 120
+LLM_CONNECT_TIMEOUT_SECONDS = 10
+LLM_READ_TIMEOUT_SECONDS = 120
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {name: client}
+_clients_lock = threading.Lock()
+_background_loop = None
+_background_loop_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the long-lived event loop thread that synchronous callers run async LLM calls on
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="judge-event-loop", daemon=True).start()
+        return _background_loop
+
+
+def run_on_background_loop(coro):
+    """
+    Runs a coroutine on a long-lived event loop thread and blocks until it finishes.
+    Lets synchronous callers (Streamlit, thread pools) share one loop and one async client.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
+
+
+def _record(client_name: str, key: str):
+    with _stats_lock:
+        stats = _stats.setdefault(client_name, {"requests": 0, "new_connections": 0, "tls_handshakes": 0})
+        stats[key] += 1
+
+
+def _tracer(client_name: str):
+    # httpcore reports connection lifecycle events through the "trace" request extension
+    def trace(event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            _record(client_name, "new_connections")
+        elif event_name == "connection.start_tls.complete":
+            _record(client_name, "tls_handshakes")
+    return trace
+
+
+def _async_tracer(client_name: str):
+    # Async connection pools require the trace callback to be a coroutine function
+    trace = _tracer(client_name)
+
+    async def async_trace(event_name, info):
+        trace(event_name, info)
+    return async_trace
+
+
+class _AsyncTracingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, client_name: str, **kwargs):
+        super().__init__(**kwargs)
+        self._trace = _async_tracer(client_name)
+        self._client_name = client_name
+
+    async def handle_async_request(self, request):
+        request.extensions["trace"] = self._trace
+        response = await super().handle_async_request(request)
+        _record(self._client_name, "requests")
+        return response
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_READ_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+
+
+def _async_http_client(client_name: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_AsyncTracingTransport(client_name, limits=_limits()), timeout=_timeout())
+
+
+def get_async_groq_client(base_url: str = None) -> AsyncGroq:
+    """
+    Returns the AsyncGroq client for the running event loop. Async connection pools can't be shared
+    across loops, so each loop gets its own client, created on first use and reused afterwards.
+    base_url points the client somewhere other than the Groq API (e.g. a local stub server).
+    """
+    client_name = f"groq:{base_url}" if base_url else "groq"
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        if client_name not in loop_clients:
+            loop_clients[client_name] = AsyncGroq(
+                api_key=st.secrets["GROQ_API_KEY"],
+                base_url=base_url,
+                http_client=_async_http_client(f"{client_name}-async"),
+                timeout=_timeout(),
+            )
+        return loop_clients[client_name]
+
+
+def get_async_openai_client(api_key_name: str, base_url: str):
+    """
+    Returns the AsyncOpenAI-compatible client for the given secret and base URL on the running event loop
+    """
+    from openai import AsyncOpenAI
+
+    client_name = f"openai:{base_url}"
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        if client_name not in loop_clients:
+            loop_clients[client_name] = AsyncOpenAI(
+                api_key=st.secrets[api_key_name],
+                base_url=base_url,
+                http_client=_async_http_client(f"{client_name}-async"),
+                timeout=_timeout(),
+            )
+        return loop_clients[client_name]
+
+
+def connection_stats() -> dict:
+    """
+    Per-client request and connection counts. reused_connection_rate close to 1 means requests
+    are riding on pooled keep-alive connections rather than opening new TCP/TLS sessions.
+    """
+    with _stats_lock:
+        report = {}
+        for client_name, stats in _stats.items():
+            requests = stats["requests"]
+            report[client_name] = {
+                **stats,
+                "reused_connection_rate": (requests - stats["new_connections"]) / requests if requests else 0.0,
+            }
+        return report
@@ -1,101 +1,12 @@
 import streamlit as st
-from openai import OpenAI
-
-translation_manual = translation_manual = """
-
-# Manual/Criteria for Judging English to Filipino Translations
-This manual outlines the key principles and specific criteria for evaluating the quality of English to Filipino translations. It emphasizes understanding the translator's purpose, the nature of the source text, and the needs of the target audience, going beyond mere word-for-word equivalence.
-I. General Translation Principles and Objectives
-1. Understanding the Translator's Role and Intent:
-    ◦ Translating is a demanding job that requires unusual training in both languages and in solving common problems of transferring ideas, knowledge, and wordplay from the original to the target language.
-    ◦ The primary goal of translation is the transfer of meaning.
-    ◦ The translator must decide their purpose: whether to imitate (panggagaya) the original by striving for faithfulness in language, form, and tone, or to reproduce (muling-pagbuo) it by adapting the meaning to the presumed interests and needs of the target society and time, offering more freedom and flexibility.
-    ◦ A translation should ultimately enrich the language and knowledge of the target language, or serve as a bridge to provide an important experience of another land and time.
-2. Degree of Fidelity vs. Freedom:
-    ◦ While often preached as needing to be "faithful" (matapat), it is impossible to be "one hundred percent faithful" because no two languages are identical.
-    ◦ John Dryden's "lunggating Dryden" (Dryden's aspiration) aimed for the translated language to be as powerful and beautiful as the original, suggesting the translated language should speak as if the original author were born into that language and time.
-    ◦ Cicero's "imperyalistang pribilehiyo" (imperialist privilege) allowed translators from a "superior" culture to freely choose translation methods without considering what might be lost from the original.
-    ◦ Translators always balance linguistic limitations with the complexities of the original and their self-imposed duties.
-    ◦ Paciano Mercado Rizal's advice (1886): Translation should align with the words when understandable, and be free when obscure, but never stray from the meaning.
-3. Accuracy (Eksaktitud) and Appropriateness (Angkop):
-    ◦ Accuracy is paramount, meaning the translation is "correct":
-        ▪ Correct reading of the text.
-        ▪ Clear interpretation.
-        ▪ Effective revitalisation of the original.
-    ◦ Appropriateness means the translation is suitable for the context, language of the time, place, community, and target sector. For instance, "Magyosi Kadiri!" was deemed inappropriate in Visayas as "ka dirí" means "here" in Cebuano, resulting in a reversed meaning.
-II. Criteria for Literary Translation
-Literary translation involves playing with language and requires the translator to capture the "illocutionary power" of the original.
-1. Capturing Literary Devices and Wordplay:
-    ◦ Recognise that creative writing is a "violence on language" (Roman Jakobson), meaning authors creatively alter common language use.
-    ◦ Identify and find equivalents for figures of speech (tayutay) and rhetorical devices (kasangkapang panretorika).
-    ◦ Rhythm and Meter: Assess if the translation captures the musicality and beat of the original. For poetry, this includes:
-        ▪ Tugma (rhyme): Repetition of sounds at the end of lines.
-        ▪ Súkat (meter): Repetition of the number of syllables per line.
-        ▪ Aliterasyon (alliteration): Repetition of consonants.
-        ▪ Asonansiya (assonance): Repetition of vowels.
-        ▪ Dramatic repetition: Repeating words or phrases to connect emotions or ideas, as "adiós" in Rizal's poem.
-    ◦ Tone (Himig): Accurately convey the author's intended tone (e.g., joyous, sarcastic, contemplative).
-        ▪ For example, Rizal's sarcastic tone in the 13th stanza of "Último adiós" regarding faith and God was effectively conveyed by Bonifacio and Tolentino.
-    ◦ Word Choice and Nuance: Select words that convey the precise emotional and literary quality of the original.
-2. Researching Cultural and Historical Context:
-    ◦ Allusions (Alusyon): Identify literary, historical, or cultural allusions embedded in the text.
-        ▪ Translators must research the "sources" (pinagkunan) of the original to ensure accurate translation.
-        ▪ Example: Rizal's "nuestro perdido Edén" (our lost Eden) alludes to Espronceda and the Biblical paradise, requiring the translator to understand these layers of meaning.
-    ◦ Author's Background: Understand the author's personal and public background, as it shapes the text.
-        ▪ Example: Rizal's "tersa frente" (smooth forehead) evolved in meaning from "A la Juventud Filipina" to "Último adiós," reflecting his evolving patriotic sentiment.
-    ◦ Cultural Content: Be aware that each language is a product of its geography, history, ideology, and experience, making 100% literal translation impossible.
-        ▪ Translators may need to introduce foreign concepts (e.g., "winter," "snow," "ice") if appropriate, thus enriching the TL.
-        ▪ Translators may choose to borrow foreign terms (e.g., "sipres, lawrel, liryo") or find conceptual equivalents based on the cultural context.
-        ▪ Be mindful of substitutions that alter ideological meaning: e.g., replacing "Dios" with "Bathala" by Bonifacio and Tolentino to align with Katipunero ideals.
-3. Handling "Halaw" (Abbreviation/Adaptation) vs. Full Translation:
-    ◦ "Halaw" and "pinagaang edisyon" (lightened editions) are problematic when presented as full translations. They often sacrifice literary quality and critical details for brevity or commercial gain.
-    ◦ True "halaw" (adaptation) can be educationally valuable if its purpose is to simplify for quick learning and to introduce students to literature, potentially leading them to the original.
-    ◦ A good "halaw" should still convey the main literary qualities of the original, such as plot and character development in a novel.
-    ◦ "Hango" (adaptation) involves reshaping the original into a modern or more appropriate form for the target audience (e.g., comic book, film). This is distinct from "halaw" as it is not simply an abridgement but a creative re-creation.
-4. Continuous Improvement:
-    ◦ No translation is permanent ("walang panghabàng-panahong salin").
-    ◦ Translators should continually review and revise their work, even after publication, to incorporate new insights, better word choices, or corrected interpretations.
-III. Criteria for Technical Translation
-Technical translation is primarily utilitarian and aims to effectively convey specialised information for practical use.
-1. Clarity and Readability:
-    ◦ The primary challenge is to ensure all relevant information is conveyed easily, properly, and effectively for the target readers.
-    ◦ Write for the target reader and write clearly.
-    ◦ Avoid unnecessary repetition.
-    ◦ Avoid unnecessary adjectives and modifiers.
-    ◦ Use simple words and simple expressions.
-    ◦ Use an active voice and affirmative tone.
-    ◦ Cite sources, expert opinions, and factual reports/test results.
-    ◦ Ensure clean spelling and punctuation.
-2. Subject Matter Expertise:
-    ◦ The translator must not be ignorant of the subject.
-    ◦ They need sufficient knowledge of the topic to translate accurately, and be adept at research to gain additional information if needed.
-    ◦ They should be a good researcher, having read related works and studies, and possess a good understanding of general scientific and technological principles.
-3. Handling Terminology (Pagtutumbas, Panghihiram, Paglikha):
-    ◦ Prioritise meaning over literal word-for-word translation. All words can have multiple meanings depending on context (e.g., "saves" can mean "nagliligtas" or "nagtitipid").
-    ◦ Systematic Approach to Vocabulary: Follow KWF's recommended steps for finding equivalents:
-        1. Pagtutumbas (Equivalence):
-            • First, search for equivalents within the current corpus of the Filipino language. This deepens the translator's knowledge of their own language and avoids excessive unnecessary borrowing.
-            • Second, look for equivalents from other indigenous languages of the Philippines. Examples include "katarúngan" (justice) from Cebuano "taróng" and "lungsód" (city) from Boholano.
-            • Be aware that true, complete equivalents are rare. Explanations, phrases, or new creations might be necessary.
-        2. Panghihiram (Borrowing):
-            • Spanish is the first language for borrowing due to historical influence. Be cautious of "siyokoy" words (incorrect forms of borrowed words).
-            • English is the second language for borrowing.
-            • Borrowing without change: For proper nouns (people, places, titles), scientific and technical terms (e.g., carbon dioxide, jus sanguinis, zeitgeist), and words difficult to immediately respell without causing confusion (e.g., cauliflower, pizza).
-            • Respell if appropriate: For words that integrate easily into Filipino orthography (e.g., "istambay," "iskedyul," "pulis"). However, avoid respelling if it makes the word awkward, harder to read, destroys cultural/religious/political meaning, or creates confusion with existing Filipino words.
-            • KWF now advises retaining the original scientific and technical terms (English, Spanish, German, Latin) in writing to ease teaching and learning in science and technology.
-        3. Paglikha (Creation/Neologism): A valuable method for enriching the TL's vocabulary.
-            • Bágong-pagbuô (new construction/neologism): Creating new words from existing Filipino morphemes or concepts (e.g., "banyuhay" for metamorphosis, "takdang-aralin" for assignment).
-            • Hirám-sálin (calquing or loan translation): Literal translation of foreign idioms or compounds (e.g., "daambakal" for railway).
-            • Bágong-húlog (new meaning/revitalisation): Giving a new, often technical, meaning to an old native word (e.g., "agham" for science, "kawani" for employee, "rabáw" for surface).
-    ◦ Consistency (Konsistensi): Maintain consistency in terminology and spelling within the translation. This is crucial for accuracy and clarity in technical texts.
-4. Objectivity vs. Subjectivity:
-    ◦ Technical texts should generally be objective and factual.
-    ◦ However, if the purpose is to popularise or persuade, the translation may adopt a subjective tone or point of view (e.g., news articles, columns). In such cases, the translator's motive becomes important.
-    ◦ Even when subjective, the translation should appear free from distortion (bending, exaggeration, or alteration) to maintain credibility, especially if used as evidence.
-
-"""
-
-judge_prompt = f"""
+from llm_client import connection_stats
+from completion_backend import backend_stats, complete, stream_completion
+from translation_manual import format_manual_sections, retrieve_manual_sections
+from history import compact_history
+from streaming import StreamRenderer, streaming_stats
+
+def build_judge_prompt(manual_sections: str) -> str:
+    return f"""
 You are a translation quality judge for ENGLISH → FILIPINO translations.
 
 TASK:
@@ -158,7 +69,7 @@ EXAMPLES:
       Flawed: Meron kang nerbiyo. Dahil lang mayaman ako hindi ibig sabihin na wala akong problema.
 
 GUIDELINE_START:
-{translation_manual}
+{manual_sections}
 
 GUIDELINE_END
 
@@ -188,9 +99,17 @@ Be thorough but concise.
 
 def clear_chat_history():
     st.session_state["messages"] = [{"role": "system", "content": "You are a translation judge."}]
+    st.session_state["manual_sections"] = []
+    st.session_state["prompt_tokens"] = []
+
+def history_for_request():
+    messages, stats = compact_history(st.session_state["messages"])
+    turn = sum(message["role"] == "user" for message in st.session_state["messages"])
+    st.session_state["prompt_tokens"].append({"turn": turn, **stats})
+    prompt_tokens_placeholder.json(st.session_state["prompt_tokens"][-20:])
+    return messages
 
 # Setup
-client = OpenAI(api_key=st.secrets["GEMINI_API_KEY"], base_url="https://generativelanguage.googleapis.com/v1beta/openai/")
 model_types = ["gemini-2.5-flash-lite"]
 
 # Streamlit App
@@ -204,8 +123,28 @@ with st.sidebar:
     streaming_enabled = st.checkbox("Enable Streaming", value=True)
     append_judge_prompt = st.checkbox("Append Judge Prompt", value=False)
 
+    with st.expander("LLM connection reuse", expanded=False):
+        st.json(connection_stats())
+
+    with st.expander("Completion backends", expanded=False):
+        st.json(backend_stats())
+
+    with st.expander("Manual sections retrieved", expanded=False):
+        st.json(st.session_state.get("manual_sections", []))
+
+    with st.expander("Streaming render", expanded=False):
+        st.json(streaming_stats())
+
+    with st.expander("Prompt tokens per request", expanded=False):
+        prompt_tokens_placeholder = st.empty()
+        prompt_tokens_placeholder.json(st.session_state.get("prompt_tokens", [])[-20:])
+
 if "messages" not in st.session_state:
     st.session_state["messages"] = [{"role": "system", "content": "You are a translation judge."}]
+if "manual_sections" not in st.session_state:
+    st.session_state["manual_sections"] = []
+if "prompt_tokens" not in st.session_state:
+    st.session_state["prompt_tokens"] = []
 
 for message in st.session_state["messages"]:
     print(message)
@@ -224,9 +163,15 @@ user_input = st.chat_input("Type your message here...")
 if user_input:
     # Add user message to session state and display
     if append_judge_prompt:
+        # Only the manual sections relevant to this message go into the prompt
+        sections = retrieve_manual_sections(user_input)
+        section_ids = [section["id"] for section in sections]
+        st.session_state["manual_sections"].append(section_ids)
+        judge_prompt = build_judge_prompt(format_manual_sections(sections))
         st.session_state["messages"].append({"role": "user", "content": judge_prompt + user_input})
         with st.chat_message("user"):
             st.markdown(judge_prompt + user_input)
+            st.caption(f"Manual sections: {', '.join(section_ids)}")
     else:
         st.session_state["messages"].append({"role": "user", "content": user_input})
         with st.chat_message("user"):
@@ -239,36 +184,35 @@ if user_input:
         
         # Process the conversation
         full_response = ""
+        request_messages = history_for_request()
         
         if streaming_enabled:
             # Streaming completion
-            stream = client.chat.completions.create(
+            stream = stream_completion(
+                "prompt_engineered",
+                request_messages,
                 model=model_types[0],
-                messages=st.session_state["messages"],
                 temperature=0.6,
-                stream=True,
             )
             
-            # Collect the streaming response
-            full_response = ""
+            # Collect the streaming response, rendered on a throttled cadence
+            renderer = StreamRenderer(message_placeholder)
             
             for chunk in stream:
                 if chunk.choices[0].delta.content:
-                    # Regular content streaming
-                    full_response += chunk.choices[0].delta.content
-                    message_placeholder.markdown(full_response + "▌")
+                    renderer.append(chunk.choices[0].delta.content)
             
+            full_response = renderer.finish()
             if full_response:
-                message_placeholder.markdown(full_response)
                 st.session_state["messages"].append({"role": "assistant", "content": full_response})
 
         else:
             # Non-streaming completion
-            completion = client.chat.completions.create(
+            completion = complete(
+                "prompt_engineered",
+                request_messages,
                 model=model_types[0],
-                messages=st.session_state["messages"],
                 temperature=0.6,
-                stream=False,
             )
             
             choice = completion.choices[0]
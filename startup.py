@@ -0,0 +1,66 @@
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Heavy dependencies are only imported when COMET scoring actually needs them (or by the optional
+# background preload), so the first page render doesn't wait on torch. Listed in dependency order
+# so each timing is roughly that module's own cost.
+HEAVY_MODULES = ["torch", "transformers", "pytorch_lightning", "comet"]
+
+_timings = {}  # name -> {"seconds": float, "thread": str}
+_timings_lock = threading.Lock()
+
+
+def record_timing(name: str, seconds: float):
+    """
+    Records a startup timing; only the first (cold) measurement per name is kept
+    """
+    with _timings_lock:
+        _timings.setdefault(name, {"seconds": round(seconds, 3), "thread": threading.current_thread().name})
+
+
+@contextmanager
+def import_timer(name: str):
+    """
+    Times a block of imports; only the first (cold) run is recorded
+    """
+    started = time.perf_counter()
+    yield
+    record_timing(name, time.perf_counter() - started)
+
+
+def timed_import(name: str):
+    """
+    Imports a module on first use and records how long the cold import took
+    """
+    if name in sys.modules:
+        # import_module still waits if another thread is midway through importing it
+        return importlib.import_module(name)
+    with import_timer(name):
+        module = importlib.import_module(name)
+    return module
+
+
+def preload_heavy_modules(module_names=None):
+    for name in module_names or HEAVY_MODULES:
+        try:
+            timed_import(name)
+        except ImportError as e:
+            print(f"Preloading {name} failed: {e}")
+
+
+def start_background_preload(module_names=None) -> threading.Thread:
+    thread = threading.Thread(target=preload_heavy_modules, args=(module_names,), name="heavy-import-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_report() -> dict:
+    """
+    Cold import and startup timings recorded so far in this process, slowest first
+    """
+    with _timings_lock:
+        timings = dict(_timings)
+    return dict(sorted(timings.items(), key=lambda item: -item[1]["seconds"]))
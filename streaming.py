@@ -0,0 +1,88 @@
+import threading
+import time
+
+# Streaming responses are buffered and rendered at most every STREAM_FLUSH_INTERVAL_SECONDS, or
+# sooner once STREAM_FLUSH_MAX_BUFFERED_CHARS new characters are waiting, instead of re-rendering
+# the whole markdown on every chunk.
+STREAM_FLUSH_INTERVAL_SECONDS = 0.05
+STREAM_FLUSH_MAX_BUFFERED_CHARS = 2_000
+STREAM_CURSOR = "▌"
+
+_stats_lock = threading.Lock()
+_stats = {"streams": 0, "chunks": 0, "renders": 0, "chars": 0}
+
+
+class StreamRenderer:
+    def __init__(
+        self,
+        placeholder,
+        flush_interval: float = STREAM_FLUSH_INTERVAL_SECONDS,
+        max_buffered_chars: int = STREAM_FLUSH_MAX_BUFFERED_CHARS,
+        cursor: str = STREAM_CURSOR,
+    ):
+        self.placeholder = placeholder
+        self.flush_interval = flush_interval
+        self.max_buffered_chars = max_buffered_chars
+        self.cursor = cursor
+        self._parts = []
+        self._text = ""
+        self._buffered_chars = 0
+        self._last_flush = time.perf_counter()
+        self._started = self._last_flush
+        self.chunks = 0
+        self.renders = 0
+
+    @property
+    def text(self) -> str:
+        if self._parts:
+            self._text += "".join(self._parts)
+            self._parts = []
+        return self._text
+
+    def append(self, chunk: str):
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        self._buffered_chars += len(chunk)
+        self.chunks += 1
+        now = time.perf_counter()
+        if now - self._last_flush >= self.flush_interval or self._buffered_chars >= self.max_buffered_chars:
+            self._render(self.text + self.cursor, now)
+
+    def finish(self) -> str:
+        """
+        Renders the complete text without the cursor and returns it
+        """
+        text = self.text
+        if text:
+            self._render(text, time.perf_counter())
+        with _stats_lock:
+            _stats["streams"] += 1
+            _stats["chunks"] += self.chunks
+            _stats["renders"] += self.renders
+            _stats["chars"] += len(text)
+        return text
+
+    def _render(self, markdown: str, now: float):
+        self.placeholder.markdown(markdown)
+        self.renders += 1
+        self._buffered_chars = 0
+        self._last_flush = now
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "renders": self.renders,
+            "chars": len(self.text),
+            "elapsed_s": round(time.perf_counter() - self._started, 3),
+        }
+
+
+def streaming_stats() -> dict:
+    """
+    Totals over finished streams; chunks_per_render is how many chunks each render coalesced
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["chunks_per_render"] = stats["chunks"] / stats["renders"] if stats["renders"] else 0.0
+    return stats
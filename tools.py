@@ -1,20 +1,200 @@
-import streamlit as st
-from groq import Groq
+import asyncio
 import json
-from comet import download_model, load_from_checkpoint
-import numpy as np
+import functools
+import random
+import textwrap
+import threading
+import time
+from comet_registry import INT8_SUFFIX, get_comet_model
+from comet_batcher import MicroBatcher
+from comet_embeddings import score_with_source_cache, source_cache_verified, supports_source_cache
+from comet_workers import CometWorkerPool
+from judge_cache import get_judge_cache, make_cache_key
+from completion_backend import complete, complete_async, primary_target
+from llm_client import run_on_background_loop
+from translation_manual import format_manual_sections, retrieve_manual_sections
 
-def evaluate_translation_with_reflection(source_en, candidate_fil, reference_fil="", domain_guidelines=""):
-    """
-    Performs translation evaluation with reflection loop
-    """
-    while True:
-        try:
-          client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-          model = "moonshotai/kimi-k2-instruct"
-    
-          # Stage 1: Initial Evaluation
-          initial_prompt = f"""You are a translation quality judge for ENGLISH → FILIPINO translations. Your job is to evaluate one translation pair at a time using exactly the six criteria listed below: Accuracy, Fluency, Coherence, Cultural Appropriateness, Guideline Adherence, and Completeness. Each criterion is worth 1 point. Sum the points then map to a final numerical score 1–5 using this rule:
+# Concurrent predict_translation_quality calls (e.g. several Streamlit sessions) are merged
+# into one forward pass by a background micro-batcher. Set to False to score inline.
+COMET_MICRO_BATCHING = True
+COMET_MICRO_BATCH_MAX_WAIT_MS = 5
+COMET_MICRO_BATCH_MAX_SIZE = 16
+
+_comet_batcher = None
+_comet_batcher_lock = threading.Lock()
+
+# Number of worker processes that run COMET inference out of process, sharing memory-mapped
+# weights. 0 scores in this process as before. A request that takes longer than the timeout gets
+# an error result and its worker is restarted.
+COMET_WORKER_PROCESSES = 0
+COMET_WORKER_TIMEOUT_SECONDS = 120
+
+_comet_worker_pool = None
+_comet_worker_pool_lock = threading.Lock()
+
+# Encode each distinct source once and reuse its embedding for every candidate scored against it.
+# Only used for ReferencelessRegression models, after a parity check against model.predict.
+COMET_SOURCE_EMBEDDING_CACHE = True
+
+# Score with the int8-quantized COMET backend on CPU-only nodes. Same as passing a model_name ending
+# in ":int8"; run comet_parity.py against the fp32 model first.
+COMET_INT8 = False
+
+JUDGE_MODEL = "moonshotai/kimi-k2-instruct"
+JUDGE_TEMPERATURE = 0.2
+STYLE_TEMPERATURE = 0.3
+
+# Each reflection stage is retried on its own with exponential backoff and jitter
+STAGE_MAX_ATTEMPTS = 4
+STAGE_BACKOFF_BASE_SECONDS = 1.0
+STAGE_BACKOFF_MAX_SECONDS = 30.0
+
+# Gating policy for skipping Stage 2/3 when the initial verdict is already trustworthy.
+# Off by default; run early_exit_harness.py on a labelled set before turning it on.
+EARLY_EXIT_POLICY = {
+    "enabled": False,
+    # Skip when the initial confidence is at least this high...
+    "min_confidence": 90,
+    # ...or when the criteria sum is perfect and COMET-QE corroborates it
+    "perfect_sum_with_comet": True,
+    # The reported score must match the mapped sum_of_criteria (5-6 -> 5, 3-4 -> 3, 0-2 -> 1)
+    "require_consistent_score": True,
+    # When a COMET-QE score is available it must not contradict the verdict
+    "comet_excellent_threshold": 0.6,
+    "comet_poor_threshold": 0.4,
+}
+
+# Opt-in: start a revision-style re-evaluation alongside the reflection call and keep it only if
+# reflection recommends "revise". Trades possibly wasted tokens for one less serial LLM latency.
+SPECULATIVE_REVISION = False
+
+# Opt-in: run the initial evaluation on a cheap model first and only escalate to the JUDGE_MODEL
+# reflection pipeline when the cheap verdict looks unreliable. Compare with benchmark_cascade.py.
+CASCADE_POLICY = {
+    "enabled": False,
+    "cheap_model": "gemini-2.5-flash-lite",
+    # completion_backend route the cheap model is called through
+    "cheap_route": "cascade",
+    # Escalate when the cheap model's confidence is below this...
+    "min_confidence": 80,
+    # ...when its score, label and per-criterion points don't agree with each other...
+    "require_consistent_verdict": True,
+    # ...when the criteria sum is one of these (one flipped criterion would change the score)...
+    "borderline_sums": [],
+    # ...or when a COMET-QE score contradicts the verdict
+    "comet_excellent_threshold": 0.6,
+    "comet_poor_threshold": 0.4,
+}
+
+# "three_call" runs initial -> reflection -> revision; "combined" asks for the reflection findings
+# and the revised evaluation in one response after Stage 1. Compare with benchmark_pipelines.py.
+PIPELINE_MODE = "three_call"
+
+# "full" asks for a reason on every criterion plus highlights and a suggested fix. "compact" returns
+# only the point for passing criteria and reasons/highlights for failures, with tighter token caps;
+# normalize_evaluation expands it back to the full result shape.
+OUTPUT_SCHEMA = "full"
+STAGE_MAX_COMPLETION_TOKENS = {
+    "full": {"initial": 2048, "reflection": 2048, "revision": 2048, "speculative revision": 2048, "reflect_and_revise": 2048},
+    "compact": {"initial": 512, "reflection": 384, "revision": 512, "speculative revision": 512, "reflect_and_revise": 896},
+}
+
+# Keys a stage's JSON object must have; any other reply (a string, a list, a truncated object) is
+# treated like a parse error and the stage is retried
+STAGE_REQUIRED_KEYS = {
+    "initial": ("criteria",),
+    "reflection": ("recommendation",),
+    "revision": ("criteria",),
+    "speculative revision": ("criteria",),
+    "reflect_and_revise": ("recommendation",),
+    "cascade initial": ("criteria",),
+    "listwise initial": ("evaluations",),
+    "listwise reflection": ("reflections",),
+    "listwise revision": ("evaluations",),
+}
+
+# evaluate_candidates_with_reflection judges several candidates for one source per request. Candidates
+# are split into chunks of at most LISTWISE_MAX_CANDIDATES_PER_CALL whose candidate text stays under
+# LISTWISE_MAX_CANDIDATE_TOKENS (~4 chars per token); each stage's completion cap is the per-candidate
+# cap times the chunk size, up to LISTWISE_MAX_COMPLETION_TOKENS.
+LISTWISE_MAX_CANDIDATES_PER_CALL = 8
+LISTWISE_MAX_CANDIDATE_TOKENS = 6000
+LISTWISE_MAX_COMPLETION_TOKENS = 8192
+
+# Bump the matching version whenever a prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSIONS = {
+    "evaluate_translation": "1",
+    "style_checker": "2",
+    "predict_translation_quality": "1",
+    "evaluate_candidates": "1",
+}
+
+CRITERIA = ["Accuracy", "Fluency", "Coherence", "Cultural Appropriateness", "Guideline Adherence", "Completeness"]
+
+EVALUATION_SCHEMAS = {
+    "full": """{
+  "score": integer,             // 1-5 final mapped score
+  "sum_of_criteria": integer,   // 0-6 raw sum of criteria points
+  "label": string,              // "excellent" (5), "good" (3), "poor" (1)
+  "criteria": {
+    "Accuracy": { "point": 0|1, "reason": string },
+    "Fluency": { "point": 0|1, "reason": string },
+    "Coherence": { "point": 0|1, "reason": string },
+    "Cultural Appropriateness": { "point": 0|1, "reason": string },
+    "Guideline Adherence": { "point": 0|1, "reason": string },
+    "Completeness": { "point": 0|1, "reason": string }
+  },
+  "highlights": [              // optional; at least one item when point==0 for any criterion
+    { "criterion": string, "source_span": string, "candidate_span": string, "explanation": string }
+  ],
+  "suggested_fix": string,     // optional short corrected version or patch (if severe issues)
+  "confidence": number         // 0-100; optional but recommended
+}""",
+    # Compact: passing criteria return only their point; reasons and highlights only for failures
+    "compact": """{
+  "score": integer,             // 1-5 final mapped score
+  "sum_of_criteria": integer,   // 0-6 raw sum of criteria points
+  "label": string,              // "excellent" (5), "good" (3), "poor" (1)
+  "criteria": {                 // list all six; a passing criterion is just 1, a failing one is an object
+    "Accuracy": 1 | { "point": 0, "reason": string },
+    "Fluency": 1 | { "point": 0, "reason": string },
+    "Coherence": 1 | { "point": 0, "reason": string },
+    "Cultural Appropriateness": 1 | { "point": 0, "reason": string },
+    "Guideline Adherence": 1 | { "point": 0, "reason": string },
+    "Completeness": 1 | { "point": 0, "reason": string }
+  },
+  "highlights": [              // only for failed criteria; omit when every criterion passes
+    { "criterion": string, "candidate_span": string, "explanation": string }
+  ],
+  "confidence": number         // 0-100
+}
+Keep every reason and explanation to one short sentence.""",
+}
+
+REVISION_SCHEMAS = {
+    "full": """{
+  "score": integer,
+  "sum_of_criteria": integer,
+  "label": string,
+  "criteria": { ... },
+  "highlights": [...],
+  "suggested_fix": string,
+  "confidence": number,
+  "revision_notes": string  // NEW: explain changes made during reflection
+}""",
+    "compact": """{
+  "score": integer,
+  "sum_of_criteria": integer,
+  "label": string,
+  "criteria": { ... },          // passing criterion: 1, failing criterion: { "point": 0, "reason": string }
+  "highlights": [...],          // only for failed criteria
+  "confidence": number,
+  "revision_notes": string      // one short sentence
+}""",
+}
+
+def build_initial_prompt(source_en, candidate_fil, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""You are a translation quality judge for ENGLISH → FILIPINO translations. Your job is to evaluate one translation pair at a time using exactly the six criteria listed below: Accuracy, Fluency, Coherence, Cultural Appropriateness, Guideline Adherence, and Completeness. Each criterion is worth 1 point. Sum the points then map to a final numerical score 1–5 using this rule:
  - Sum 5–6 → 5
  - Sum 3–4 → 3
  - Sum 0–2 → 1
@@ -30,37 +210,10 @@ INPUT:
 }}
 
 JSON_SCHEMA:
-{{
-  "score": integer,             // 1-5 final mapped score
-  "sum_of_criteria": integer,   // 0-6 raw sum of criteria points
-  "label": string,              // "excellent" (5), "good" (3), "poor" (1)
-  "criteria": {{
-    "Accuracy": {{ "point": 0|1, "reason": string }},
-    "Fluency": {{ "point": 0|1, "reason": string }},
-    "Coherence": {{ "point": 0|1, "reason": string }},
-    "Cultural Appropriateness": {{ "point": 0|1, "reason": string }},
-    "Guideline Adherence": {{ "point": 0|1, "reason": string }},
-    "Completeness": {{ "point": 0|1, "reason": string }}
-  }},
-  "highlights": [              // optional; at least one item when point==0 for any criterion
-    {{ "criterion": string, "source_span": string, "candidate_span": string, "explanation": string }}
-  ],
-  "suggested_fix": string,     // optional short corrected version or patch (if severe issues)
-  "confidence": number         // 0-100; optional but recommended
-}}"""
+{EVALUATION_SCHEMAS[schema]}"""
 
-          # Get initial evaluation
-          initial_response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": initial_prompt}],
-            temperature=0.2,
-            max_completion_tokens=2048
-          )
-          # print(initial_response.choices[0].message.content)
-          initial_evaluation = json.loads(initial_response.choices[0].message.content)
-    
-          # Stage 2: Reflection Phase
-          reflection_prompt = f"""You previously evaluated an English-to-Filipino translation. Now critically examine your own judgment for potential errors or oversights.
+def build_reflection_prompt(initial_evaluation, source_en, candidate_fil, reference_fil="", domain_guidelines="", schema="full"):
+    prompt = f"""You previously evaluated an English-to-Filipino translation. Now critically examine your own judgment for potential errors or oversights.
 
 ORIGINAL EVALUATION:
 {json.dumps(initial_evaluation, indent=2)}
@@ -116,20 +269,12 @@ Return only raw JSON without any markdown code fences or syntax highlighting wit
   "recommendation": "maintain" | "revise",
   "revision_needed_for": [list of criteria that should be reconsidered]
 }}"""
+    if schema == "compact":
+        prompt += "\nKeep it short: at most 3 items per list, one short phrase each, and an empty string for potential_bias_detected if none."
+    return prompt
 
-          # Get reflection analysis
-          reflection_response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": reflection_prompt}],
-            temperature=0.2,
-            max_completion_tokens=2048
-          )
-          # print(reflection_response.choices[0].message.content)
-          reflection_analysis = json.loads(reflection_response.choices[0].message.content)
-    
-          # Stage 3: Final Evaluation (if revision needed)
-          if reflection_analysis.get("recommendation") == "revise":
-            revision_prompt = f"""Based on your reflection analysis, provide a REVISED evaluation of the translation pair. Consider the concerns you identified and provide an updated assessment.
+def build_revision_prompt(initial_evaluation, reflection_analysis, source_en, candidate_fil, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""Based on your reflection analysis, provide a REVISED evaluation of the translation pair. Consider the concerns you identified and provide an updated assessment.
 
 ORIGINAL EVALUATION:
 {json.dumps(initial_evaluation, indent=2)}
@@ -146,69 +291,1207 @@ Domain Guidelines: "{domain_guidelines}"
 Provide your FINAL revised evaluation using the same JSON schema as before. Include a "revision_notes" field explaining what you changed and why.
 Return only raw JSON without any markdown code fences or syntax highlighting. Make sure that the score match the sum_of_criteria. Recall that 5-6 -> 5, 3-4 -> 3, 0-2 -> 1.
 JSON_SCHEMA (same as before, plus):
+{REVISION_SCHEMAS[schema]}"""
+
+def build_speculative_revision_prompt(initial_evaluation, source_en, candidate_fil, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""Critically re-examine your previous evaluation of an English-to-Filipino translation and provide a REVISED evaluation. Check each criterion again for missed meaning differences, unnatural Filipino, broken flow, cultural or register issues (including po/opo), guideline violations, omissions and additions, and for bias toward longer or shorter translations.
+
+ORIGINAL EVALUATION:
+{json.dumps(initial_evaluation, indent=2)}
+
+TRANSLATION PAIR:
+Source (English): "{source_en}"
+Candidate (Filipino): "{candidate_fil}"
+Reference (Filipino): "{reference_fil}"
+Domain Guidelines: "{domain_guidelines}"
+
+Provide your FINAL revised evaluation using the same JSON schema as before. Include a "revision_notes" field explaining what you changed and why.
+Return only raw JSON without any markdown code fences or syntax highlighting. Make sure that the score match the sum_of_criteria. Recall that 5-6 -> 5, 3-4 -> 3, 0-2 -> 1.
+JSON_SCHEMA (same as before, plus):
+{REVISION_SCHEMAS[schema]}"""
+
+def build_reflect_and_revise_prompt(initial_evaluation, source_en, candidate_fil, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""You previously evaluated an English-to-Filipino translation. Critically examine your own judgment for potential errors or oversights, then give your final evaluation in the same response.
+
+ORIGINAL EVALUATION:
+{json.dumps(initial_evaluation, indent=2)}
+
+TRANSLATION PAIR:
+Source (English): "{source_en}"
+Candidate (Filipino): "{candidate_fil}"
+Reference (Filipino): "{reference_fil}"
+Domain Guidelines: "{domain_guidelines}"
+
+REFLECTION CHECKLIST - Answer each question honestly:
+1. ACCURACY: Did I miss subtle meaning differences or valid alternative interpretations?
+2. FLUENCY: Did I assess Filipino grammar and natural expressions, allowing for acceptable regional variation?
+3. COHERENCE: Does the translation keep a logical flow, with proper discourse markers and connectives?
+4. CULTURAL APPROPRIATENESS: Did I assess formality (po/opo), cultural nuances and social register?
+5. GUIDELINE ADHERENCE: Did I apply the domain guidelines and specialized terms consistently?
+6. COMPLETENESS: Are all source elements represented, without omissions or inappropriate additions?
+BIAS CHECK: Am I preferring longer/shorter translations, applying Filipino standards consistently, and considering multiple valid approaches?
+
+If your reflection recommends "revise", "final_evaluation" is your REVISED evaluation. If it recommends "maintain", "final_evaluation" repeats the original evaluation. Make sure that the score match the sum_of_criteria. Recall that 5-6 -> 5, 3-4 -> 3, 0-2 -> 1.
+Return only raw JSON without any markdown code fences or syntax highlighting:
 {{
-  "score": integer,
-  "sum_of_criteria": integer,
-  "label": string,
-  "criteria": {{ ... }},
-  "highlights": [...],
-  "suggested_fix": string,
-  "confidence": number,
-  "revision_notes": string  // NEW: explain changes made during reflection
+  "reflection_findings": {{
+    "concerns_identified": [list of specific concerns],
+    "confidence_issues": [criteria where you have lower confidence],
+    "potential_bias_detected": string,
+    "missed_considerations": [things you may have overlooked]
+  }},
+  "recommendation": "maintain" | "revise",
+  "revision_needed_for": [list of criteria that should be reconsidered],
+  "final_evaluation": {textwrap.indent(REVISION_SCHEMAS[schema], "  ").lstrip()}
 }}"""
 
-            # Get final evaluation
-            final_response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": revision_prompt}],
-                temperature=0.2,
-                max_completion_tokens=2048
-            )
-            # print(final_response.choices[0].message.content)
-            final_evaluation = json.loads(final_response.choices[0].message.content)
-          else:
-            final_evaluation = initial_evaluation
-            final_evaluation["revision_notes"] = "No revision needed after reflection"
-    
-          # Compile complete result
-   
-          result = {
-            "initial_evaluation": initial_evaluation,
-            "reflection_analysis": reflection_analysis,
+def _listwise_input(source_en, candidates, reference_fil="", domain_guidelines=""):
+    return json.dumps({
+        "source_en": source_en,
+        "reference_fil": reference_fil,
+        "domain_guidelines": domain_guidelines,
+        "candidates": candidates
+    }, ensure_ascii=False, indent=2)
+
+def build_listwise_initial_prompt(source_en, candidates, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""You are a translation quality judge for ENGLISH → FILIPINO translations. Below are several candidate Filipino translations of the same English source, keyed by candidate id. Evaluate EACH candidate on its own using exactly the six criteria: Accuracy, Fluency, Coherence, Cultural Appropriateness, Guideline Adherence, and Completeness. Each criterion is worth 1 point. Sum the points then map to a final numerical score 1–5 using this rule:
+ - Sum 5–6 → 5
+ - Sum 3–4 → 3
+ - Sum 0–2 → 1
+Apply the same standard to every candidate, without preferring longer or shorter ones, then rank the candidates from best to worst.
+
+ALWAYS return valid JSON only, with the exact keys shown in the JSON schema. Do NOT include chain-of-thought or extra text. Return only raw JSON without any markdown code fences or syntax highlighting.
+
+INPUT:
+{_listwise_input(source_en, candidates, reference_fil, domain_guidelines)}
+
+JSON_SCHEMA:
+{{
+  "evaluations": {{             // one entry per candidate id, each an EVALUATION
+    "<candidate id>": EVALUATION
+  }},
+  "ranking": [string]           // candidate ids, best first
+}}
+
+EVALUATION:
+{EVALUATION_SCHEMAS[schema]}"""
+
+def build_listwise_reflection_prompt(initial_evaluations, source_en, candidates, reference_fil="", domain_guidelines="", schema="full"):
+    prompt = f"""You previously evaluated several English-to-Filipino candidate translations of the same source. Now critically examine your judgment of EACH candidate for potential errors or oversights: missed meaning differences, ungrammatical or unnatural Filipino, broken flow, formality and cultural issues (including po/opo), inconsistently applied domain guidelines, omissions and additions. Also check whether you applied the same standard to every candidate and showed no preference for longer or shorter translations.
+
+ORIGINAL EVALUATIONS:
+{json.dumps(initial_evaluations, ensure_ascii=False, indent=2)}
+
+TRANSLATIONS:
+{_listwise_input(source_en, candidates, reference_fil, domain_guidelines)}
+
+Return only raw JSON without any markdown code fences or syntax highlighting with your reflection analysis, one entry per candidate id:
+{{
+  "reflections": {{
+    "<candidate id>": {{
+      "reflection_findings": {{
+        "concerns_identified": [list of specific concerns],
+        "confidence_issues": [criteria where you have lower confidence],
+        "potential_bias_detected": string,
+        "missed_considerations": [things you may have overlooked]
+      }},
+      "recommendation": "maintain" | "revise",
+      "revision_needed_for": [list of criteria that should be reconsidered]
+    }}
+  }}
+}}"""
+    if schema == "compact":
+        prompt += "\nKeep it short: at most 3 items per list, one short phrase each, and an empty string for potential_bias_detected if none."
+    return prompt
+
+def build_listwise_revision_prompt(initial_evaluations, reflections, source_en, candidates, reference_fil="", domain_guidelines="", schema="full"):
+    return f"""Based on your reflection analysis, provide REVISED evaluations for the candidate translations below. Consider the concerns you identified for each candidate and provide an updated assessment.
+
+ORIGINAL EVALUATIONS:
+{json.dumps(initial_evaluations, ensure_ascii=False, indent=2)}
+
+REFLECTION FINDINGS:
+{json.dumps(reflections, ensure_ascii=False, indent=2)}
+
+TRANSLATIONS:
+{_listwise_input(source_en, candidates, reference_fil, domain_guidelines)}
+
+Provide your FINAL revised evaluation for every candidate id above using the same JSON schema as before, each with a "revision_notes" field explaining what you changed and why.
+Return only raw JSON without any markdown code fences or syntax highlighting. Make sure that each score matches its sum_of_criteria. Recall that 5-6 -> 5, 3-4 -> 3, 0-2 -> 1.
+JSON_SCHEMA:
+{{
+  "evaluations": {{
+    "<candidate id>": REVISED_EVALUATION
+  }}
+}}
+
+REVISED_EVALUATION (same as before, plus):
+{REVISION_SCHEMAS[schema]}"""
+
+_speculation_stats = {}  # domain -> counters
+_speculation_stats_lock = threading.Lock()
+_cascade_stats = {"judgements": 0, "escalated": 0, "cheap_failures": 0, "cheap_latency_s": 0.0, "expensive_latency_s": 0.0, "reasons": {}}
+_cascade_stats_lock = threading.Lock()
+
+def map_sum_to_score(sum_of_criteria):
+    if sum_of_criteria >= 5:
+        return 5
+    elif sum_of_criteria >= 3:
+        return 3
+    return 1
+
+SCORE_LABELS = {5: "excellent", 3: "good", 1: "poor"}
+
+def normalize_evaluation(evaluation):
+    """
+    Expands a compact evaluation into the full result shape: every criterion as {"point", "reason"},
+    sum_of_criteria/score/label recomputed from the points, and highlights/suggested_fix always present
+    """
+    criteria = {}
+    raw_criteria = evaluation.get("criteria") or {}
+    for name in CRITERIA:
+        value = raw_criteria.get(name)
+        if isinstance(value, dict):
+            point = 1 if value.get("point") in (1, "1", True) else 0
+            reason = value.get("reason") or ("Meets the standard." if point else "")
+        elif value in (1, "1", True):
+            point, reason = 1, "Meets the standard."
+        else:
+            point, reason = 0, "Missing from the model output." if value is None else ""
+        criteria[name] = {"point": point, "reason": reason}
+
+    sum_of_criteria = sum(criterion["point"] for criterion in criteria.values())
+    score = map_sum_to_score(sum_of_criteria)
+    return {
+        **evaluation,
+        "score": score,
+        "sum_of_criteria": sum_of_criteria,
+        "label": SCORE_LABELS[score],
+        "criteria": criteria,
+        "highlights": evaluation.get("highlights") or [],
+        "suggested_fix": evaluation.get("suggested_fix") or "",
+    }
+
+def early_exit_decision(initial_evaluation, comet_score=None, policy=None):
+    """
+    Decides whether the reflection and revision stages can be skipped. Returns (skip, reason).
+    """
+    policy = policy or EARLY_EXIT_POLICY
+    if not policy.get("enabled"):
+        return False, "early exit disabled"
+
+    try:
+        score = int(initial_evaluation["score"])
+        sum_of_criteria = int(initial_evaluation["sum_of_criteria"])
+        confidence = float(initial_evaluation.get("confidence") or 0)
+    except (KeyError, TypeError, ValueError):
+        return False, "initial evaluation is missing score fields"
+
+    if policy.get("require_consistent_score") and map_sum_to_score(sum_of_criteria) != score:
+        return False, f"score {score} does not match sum_of_criteria {sum_of_criteria}"
+
+    if comet_score is not None:
+        if score == 5 and comet_score < policy["comet_poor_threshold"]:
+            return False, f"COMET-QE {comet_score:.2f} contradicts score {score}"
+        if score == 1 and comet_score >= policy["comet_excellent_threshold"]:
+            return False, f"COMET-QE {comet_score:.2f} contradicts score {score}"
+
+    if confidence >= policy["min_confidence"]:
+        return True, f"confidence {confidence:.0f} >= {policy['min_confidence']}"
+    if (
+        policy.get("perfect_sum_with_comet")
+        and sum_of_criteria == 6
+        and comet_score is not None
+        and comet_score >= policy["comet_excellent_threshold"]
+    ):
+        return True, f"perfect sum_of_criteria corroborated by COMET-QE {comet_score:.2f}"
+    return False, f"confidence {confidence:.0f} < {policy['min_confidence']}"
+
+async def evaluate_translation_with_reflection_async(
+    source_en,
+    candidate_fil,
+    reference_fil="",
+    domain_guidelines="",
+    use_cache=True,
+    comet_score=None,
+    early_exit_policy=None,
+    speculative=None,
+    pipeline_mode=None,
+    schema=None,
+    cascade_policy=None
+):
+    """
+    Performs translation evaluation with reflection loop without blocking a thread on the LLM calls
+    """
+    cascade_policy = cascade_policy or CASCADE_POLICY
+    if cascade_policy.get("enabled"):
+        return await evaluate_translation_cascade_async(
+            source_en, candidate_fil, reference_fil, domain_guidelines, use_cache, comet_score, cascade_policy,
+            early_exit_policy=early_exit_policy, speculative=speculative, pipeline_mode=pipeline_mode, schema=schema
+        )
+    early_exit_policy = early_exit_policy or EARLY_EXIT_POLICY
+    speculative = SPECULATIVE_REVISION if speculative is None else speculative
+    pipeline_mode = pipeline_mode or PIPELINE_MODE
+    schema = schema or OUTPUT_SCHEMA
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        inputs = {"source_en": source_en, "candidate_fil": candidate_fil, "reference_fil": reference_fil, "domain_guidelines": domain_guidelines}
+        if early_exit_policy.get("enabled"):
+            # The path taken depends on the gate, so its inputs are part of the key
+            inputs["comet_score"] = comet_score
+            inputs["early_exit_policy"] = early_exit_policy
+        if speculative:
+            inputs["speculative"] = True
+        if pipeline_mode != "three_call":
+            inputs["pipeline_mode"] = pipeline_mode
+        if schema != "full":
+            inputs["schema"] = schema
+        cache_key = make_cache_key(
+            "evaluate_translation",
+            inputs,
+            JUDGE_MODEL,
+            JUDGE_TEMPERATURE,
+            PROMPT_VERSIONS["evaluate_translation"]
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+
+    result = await _run_reflection_pipeline(
+        source_en, candidate_fil, reference_fil, domain_guidelines, comet_score, early_exit_policy, speculative, pipeline_mode, schema
+    )
+    if cache is not None and "error" not in result and _served_by_primary(result["usage"], ("judge", JUDGE_MODEL)):
+        cache.set(cache_key, "evaluate_translation", result)
+    return result
+
+def cascade_decision(evaluation, comet_score=None, policy=None):
+    """
+    Decides whether a cheap-tier evaluation has to be escalated. Returns (escalate, reasons) where
+    reasons maps a reason key to a short explanation.
+    """
+    policy = policy or CASCADE_POLICY
+    try:
+        score = int(evaluation["score"])
+        sum_of_criteria = int(evaluation["sum_of_criteria"])
+        confidence = float(evaluation.get("confidence") or 0)
+    except (KeyError, TypeError, ValueError):
+        return True, {"invalid": "evaluation is missing score fields"}
+
+    reasons = {}
+    if policy.get("require_consistent_verdict"):
+        if map_sum_to_score(sum_of_criteria) != score:
+            reasons["inconsistent_score"] = f"score {score} does not match sum_of_criteria {sum_of_criteria}"
+        label = str(evaluation.get("label", "")).lower()
+        if label != SCORE_LABELS.get(score):
+            reasons["inconsistent_label"] = f"label {label!r} does not match score {score}"
+        criteria = evaluation.get("criteria") or {}
+        points = [value.get("point") if isinstance(value, dict) else value for value in (criteria.get(name) for name in CRITERIA)]
+        if any(point not in (0, 1) for point in points):
+            reasons["criteria_mismatch"] = "not every criterion has a 0/1 point"
+        elif sum(points) != sum_of_criteria:
+            reasons["criteria_mismatch"] = f"criterion points add up to {sum(points)}, not {sum_of_criteria}"
+    if sum_of_criteria in policy.get("borderline_sums", []):
+        reasons["borderline_sum"] = f"sum_of_criteria {sum_of_criteria} is borderline"
+    if confidence < policy["min_confidence"]:
+        reasons["low_confidence"] = f"confidence {confidence:.0f} < {policy['min_confidence']}"
+    if comet_score is not None:
+        if score == 5 and comet_score < policy["comet_poor_threshold"]:
+            reasons["comet_contradiction"] = f"COMET-QE {comet_score:.2f} contradicts score {score}"
+        elif score == 1 and comet_score >= policy["comet_excellent_threshold"]:
+            reasons["comet_contradiction"] = f"COMET-QE {comet_score:.2f} contradicts score {score}"
+    return bool(reasons), reasons
+
+def _record_cascade(escalated, reasons, cheap_latency_s, expensive_latency_s=0.0, cheap_failed=False):
+    with _cascade_stats_lock:
+        _cascade_stats["judgements"] += 1
+        _cascade_stats["escalated"] += int(escalated)
+        _cascade_stats["cheap_failures"] += int(cheap_failed)
+        _cascade_stats["cheap_latency_s"] += cheap_latency_s
+        _cascade_stats["expensive_latency_s"] += expensive_latency_s
+        for reason in reasons:
+            _cascade_stats["reasons"][reason] = _cascade_stats["reasons"].get(reason, 0) + 1
+
+def cascade_stats() -> dict:
+    """
+    Escalation rate, escalation reasons and mean latency per tier of the judge cascade
+    """
+    with _cascade_stats_lock:
+        stats = {**_cascade_stats, "reasons": dict(_cascade_stats["reasons"])}
+    judgements, escalated = stats["judgements"], stats["escalated"]
+    stats["escalation_rate"] = escalated / judgements if judgements else 0.0
+    stats["mean_cheap_latency_s"] = stats.pop("cheap_latency_s") / judgements if judgements else 0.0
+    stats["mean_expensive_latency_s"] = stats.pop("expensive_latency_s") / escalated if escalated else 0.0
+    return stats
+
+async def evaluate_translation_cascade_async(
+    source_en,
+    candidate_fil,
+    reference_fil="",
+    domain_guidelines="",
+    use_cache=True,
+    comet_score=None,
+    policy=None,
+    **options
+):
+    """
+    Evaluates with the cheap model first and escalates to the full JUDGE_MODEL reflection pipeline
+    when cascade_decision flags the cheap verdict. Extra keyword options (early_exit_policy,
+    pipeline_mode, schema, ...) apply to the escalated pipeline.
+    """
+    policy = policy or CASCADE_POLICY
+    schema = options.get("schema") or OUTPUT_SCHEMA
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        inputs = {
+            "source_en": source_en,
+            "candidate_fil": candidate_fil,
+            "reference_fil": reference_fil,
+            "domain_guidelines": domain_guidelines,
+            "comet_score": comet_score,
+            "cascade_policy": policy,
+            "options": options
+        }
+        cache_key = make_cache_key(
+            "evaluate_translation_cascade",
+            inputs,
+            policy["cheap_model"],
+            JUDGE_TEMPERATURE,
+            PROMPT_VERSIONS["evaluate_translation"]
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+
+    cheap_usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    cheap_evaluation = None
+    cheap_attempts = 1
+    started = time.perf_counter()
+    try:
+        cheap_evaluation = await _run_stage(
+            "cascade initial",
+            build_initial_prompt(source_en, candidate_fil, reference_fil, domain_guidelines, schema),
+            cheap_usage,
+            STAGE_MAX_COMPLETION_TOKENS[schema]["initial"],
+            model=policy["cheap_model"],
+            route=policy["cheap_route"]
+        )
+        # Checked before normalize_evaluation, which would make the verdict consistent by construction
+        escalate, reasons = cascade_decision(cheap_evaluation, comet_score, policy)
+        if schema == "compact":
+            cheap_evaluation = normalize_evaluation(cheap_evaluation)
+    except StageError as e:
+        cheap_attempts = e.attempts
+        escalate, reasons = True, {"cheap_failed": str(e.cause)}
+    cheap_latency = time.perf_counter() - started
+
+    cascade = {
+        "cheap_model": policy["cheap_model"],
+        "escalated": escalate,
+        "reasons": reasons,
+        "cheap_attempts": cheap_attempts,
+        "tier_latency_s": {"cheap": round(cheap_latency, 3)},
+        "usage_by_tier": {"cheap": cheap_usage}
+    }
+    if not escalate:
+        _record_cascade(False, reasons, cheap_latency)
+        final_evaluation = dict(cheap_evaluation)
+        final_evaluation["revision_notes"] = f"Accepted from {policy['cheap_model']} without escalation"
+        result = {
+            "initial_evaluation": cheap_evaluation,
+            "reflection_analysis": None,
             "final_evaluation": final_evaluation,
-            "reflection_triggered": reflection_analysis.get("recommendation") == "revise"
-          }
-          # print(result)
-          return result
+            "reflection_triggered": False,
+            "pipeline_path": "cascade_cheap",
+            "gate_reason": "cheap verdict accepted",
+            "usage": cheap_usage,
+            "cascade": cascade
+        }
+    else:
+        started = time.perf_counter()
+        result = await evaluate_translation_with_reflection_async(
+            source_en, candidate_fil, reference_fil, domain_guidelines, use_cache, comet_score,
+            cascade_policy={"enabled": False}, **options
+        )
+        expensive_latency = time.perf_counter() - started
+        _record_cascade(True, reasons, cheap_latency, expensive_latency, cheap_failed="cheap_failed" in reasons)
+        cascade["expensive_cache_hit"] = bool(result.get("cache_hit"))
+        result = {k: v for k, v in result.items() if k != "cache_hit"}
+        cascade["cheap_evaluation"] = cheap_evaluation
+        cascade["tier_latency_s"]["expensive"] = round(expensive_latency, 3)
+        cascade["usage_by_tier"]["expensive"] = result.get("usage") or {}
+        usage = dict(cheap_usage)
+        _merge_usage(usage, result.get("usage") or {})
+        result["usage"] = usage
+        result["cascade"] = cascade
+
+    if (
+        cache is not None
+        and "error" not in result
+        and _served_by_primary(result["usage"], ("judge", JUDGE_MODEL), (policy["cheap_route"], policy["cheap_model"]))
+    ):
+        cache.set(cache_key, "evaluate_translation_cascade", result)
+    return result
+
+class StageError(Exception):
+    def __init__(self, stage, attempts, cause):
+        super().__init__(f"{stage} stage failed after {attempts} attempts: {cause}")
+        self.stage = stage
+        self.attempts = attempts
+        self.cause = cause
+
+def parse_json_response(content):
+    # Models occasionally wrap the JSON in a markdown fence despite being told not to
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else ""
+        content = content.rsplit("```", 1)[0]
+    return json.loads(content)
+
+def _check_stage_output(stage, parsed):
+    """
+    Raises ValueError unless parsed is a JSON object with the stage's required keys
+    """
+    if not isinstance(parsed, dict):
+        raise ValueError(f"expected a JSON object, got {type(parsed).__name__}")
+    missing = [key for key in STAGE_REQUIRED_KEYS.get(stage, ()) if key not in parsed]
+    if missing:
+        raise ValueError(f"JSON object is missing {', '.join(missing)}")
+    if stage == "reflect_and_revise" and parsed["recommendation"] == "revise":
+        # A revise verdict is only usable with the revised evaluation that should come with it
+        final_evaluation = parsed.get("final_evaluation")
+        if not isinstance(final_evaluation, dict) or "criteria" not in final_evaluation:
+            raise ValueError("recommendation is revise but final_evaluation has no criteria")
+    return parsed
+
+def _retry_delay(error, attempt):
+    # Exponential backoff with full jitter, but never shorter than a provider's Retry-After
+    delay = random.uniform(0, min(STAGE_BACKOFF_MAX_SECONDS, STAGE_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+    response = getattr(error, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if retry_after is not None:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+def _merge_usage(usage, other):
+    for key in ("prompt_tokens", "completion_tokens"):
+        usage[key] = usage.get(key, 0) + (other.get(key) or 0)
+    # "backend:model" -> calls it answered, so hedge and failover answers stay attributable
+    for target, calls in (other.get("served_by") or {}).items():
+        served_by = usage.setdefault("served_by", {})
+        served_by[target] = served_by.get(target, 0) + calls
+
+def _add_usage(usage, response, target=None):
+    if usage is None:
+        return
+    other = {"served_by": {target: 1}} if target else {}
+    if getattr(response, "usage", None) is not None:
+        other["prompt_tokens"] = response.usage.prompt_tokens
+        other["completion_tokens"] = response.usage.completion_tokens
+    _merge_usage(usage, other)
+
+def _served_by_primary(usage, *routes):
+    """
+    True when every call was answered by the primary target of one of the given (route, model)
+    pairs. Cache keys name the primary model, so results from a hedge or failover target aren't cached.
+    """
+    allowed = {primary_target(route, model) for route, model in routes}
+    return set((usage or {}).get("served_by") or {}) <= allowed
+
+async def _run_stage(stage, prompt, usage=None, max_completion_tokens=2048, model=None, route="judge"):
+    """
+    Runs one pipeline stage, retrying only this stage on transient or parse errors.
+    Token usage of every attempt is added to the optional usage dict.
+    """
+    for attempt in range(1, STAGE_MAX_ATTEMPTS + 1):
+        try:
+            served_by = []
+            response = await complete_async(
+                route,
+                [{"role": "user", "content": prompt}],
+                model=model or JUDGE_MODEL,
+                temperature=JUDGE_TEMPERATURE,
+                max_completion_tokens=max_completion_tokens,
+                served_by=served_by
+            )
+            _add_usage(usage, response, served_by[0])
+            return _check_stage_output(stage, parse_json_response(response.choices[0].message.content))
         except Exception as e:
-           print(f"We encountered an error but we will try again kekw. {e}")
+            if attempt == STAGE_MAX_ATTEMPTS:
+                raise StageError(stage, attempt, e)
+            delay = _retry_delay(e, attempt)
+            print(f"{stage} stage failed (attempt {attempt}/{STAGE_MAX_ATTEMPTS}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
 
-def predict_translation_quality(
-    source_en: str, 
-    candidate_fil: str, 
-    model_name: str = "Unbabel/wmt20-comet-qe-da"
-) -> dict:
+def _record_speculation(domain_guidelines, outcome, latency_saved_s=0.0, wasted_usage=None):
+    wasted_usage = wasted_usage or {}
+    with _speculation_stats_lock:
+        stats = _speculation_stats.setdefault(domain_guidelines or "default", {
+            "speculations": 0,
+            "committed": 0,
+            "discarded": 0,
+            "failed": 0,
+            "latency_saved_s": 0.0,
+            "wasted_prompt_tokens": 0,
+            "wasted_completion_tokens": 0
+        })
+        stats["speculations"] += 1
+        stats[outcome] += 1
+        stats["latency_saved_s"] += latency_saved_s
+        stats["wasted_prompt_tokens"] += wasted_usage.get("prompt_tokens", 0)
+        stats["wasted_completion_tokens"] += wasted_usage.get("completion_tokens", 0)
+
+def speculation_stats() -> dict:
+    """
+    Per-domain accounting of speculative revisions: how often they were committed, the latency
+    they saved, and the tokens spent on discarded or failed ones
+    """
+    with _speculation_stats_lock:
+        return {
+            domain: {**stats, "commit_rate": stats["committed"] / stats["speculations"] if stats["speculations"] else 0.0}
+            for domain, stats in _speculation_stats.items()
+        }
+
+async def _discard_speculation(task, speculative_usage, speculative_prompt):
+    """
+    Cancels a speculative revision and waits for it, so a failure is retrieved rather than leaked.
+    Returns (outcome, finished_before_cancel, wasted_usage).
+    """
+    finished = task.done() and not task.cancelled()
+    task.cancel()
+    outcome = (await asyncio.gather(task, return_exceptions=True))[0]
+    wasted_usage = dict(speculative_usage)
+    if not finished:
+        # A request cancelled in flight reports no usage, so its prompt is estimated at ~4 chars per token
+        wasted_usage["prompt_tokens"] = wasted_usage.get("prompt_tokens", 0) + len(speculative_prompt) // 4
+    return ("failed" if isinstance(outcome, StageError) else "discarded"), finished, wasted_usage
+
+async def _timed_stage(stage, prompt, usage, max_completion_tokens=2048):
+    started = time.perf_counter()
+    result = await _run_stage(stage, prompt, usage, max_completion_tokens)
+    return result, time.perf_counter() - started
+
+async def _run_reflection_pipeline(
+    source_en,
+    candidate_fil,
+    reference_fil,
+    domain_guidelines,
+    comet_score=None,
+    early_exit_policy=None,
+    speculative=False,
+    pipeline_mode="three_call",
+    schema="full"
+):
+    caps = STAGE_MAX_COMPLETION_TOKENS[schema]
+    # Each stage's parsed output is kept, so a failure only retries the stage that failed
+    stages = {}
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    speculation = None
     try:
-        # Download and load the model (cached after first run)
-        model_path = download_model(model_name)
-        model = load_from_checkpoint(model_path)
-        
-        # Prepare input data
-        data = [{"src": source_en, "mt": candidate_fil}]
-        
-        # Predict quality score
-        model_output = model.predict(data, batch_size=1, gpus=0)  # Use gpus=1 if available
-        
-        # Extract scores and convert to interpretable metrics
-        score = float(np.mean(model_output.scores))
+        # Stage 1: Initial Evaluation
+        stages["initial_evaluation"] = await _run_stage(
+            "initial", build_initial_prompt(source_en, candidate_fil, reference_fil, domain_guidelines, schema), usage, caps["initial"]
+        )
+        # The gate checks the model's own score/sum/label, so it runs before normalize_evaluation recomputes them
+        skip_reflection, gate_reason = early_exit_decision(stages["initial_evaluation"], comet_score, early_exit_policy)
+        if schema == "compact":
+            # The raw output is kept so early_exit_harness.py can replay the gate on what it saw live
+            stages["raw_initial_evaluation"] = stages["initial_evaluation"]
+            stages["initial_evaluation"] = normalize_evaluation(stages["initial_evaluation"])
+        initial_evaluation = stages["initial_evaluation"]
+        raw_initial = {"raw_initial_evaluation": stages["raw_initial_evaluation"]} if schema == "compact" else {}
+
+        if skip_reflection:
+            final_evaluation = dict(initial_evaluation)
+            final_evaluation["revision_notes"] = f"Reflection skipped: {gate_reason}"
+            return {
+                "initial_evaluation": initial_evaluation,
+                **raw_initial,
+                "reflection_analysis": None,
+                "final_evaluation": final_evaluation,
+                "reflection_triggered": False,
+                "pipeline_path": "early_exit",
+                "gate_reason": gate_reason,
+                "usage": usage
+            }
+
+        if pipeline_mode == "combined":
+            # Stage 2+3 in one call: reflection findings and the final evaluation together
+            combined = await _run_stage(
+                "reflect_and_revise", build_reflect_and_revise_prompt(initial_evaluation, source_en, candidate_fil, reference_fil, domain_guidelines, schema), usage, caps["reflect_and_revise"]
+            )
+            stages["reflection_analysis"] = {k: v for k, v in combined.items() if k != "final_evaluation"}
+            reflection_analysis = stages["reflection_analysis"]
+            reflection_triggered = reflection_analysis.get("recommendation") == "revise"
+            if reflection_triggered:
+                final_evaluation = combined["final_evaluation"]
+                if schema == "compact":
+                    final_evaluation = normalize_evaluation(final_evaluation)
+            else:
+                final_evaluation = dict(initial_evaluation)
+                final_evaluation["revision_notes"] = "No revision needed after reflection"
+            return {
+                "initial_evaluation": initial_evaluation,
+                **raw_initial,
+                "reflection_analysis": reflection_analysis,
+                "final_evaluation": final_evaluation,
+                "reflection_triggered": reflection_triggered,
+                "pipeline_path": "combined",
+                "gate_reason": gate_reason,
+                "usage": usage
+            }
+
+        # Speculatively start a re-evaluation while reflection runs
+        speculative_task = None
+        if speculative:
+            speculative_usage = {}
+            speculative_prompt = build_speculative_revision_prompt(initial_evaluation, source_en, candidate_fil, reference_fil, domain_guidelines, schema)
+            speculative_task = asyncio.create_task(
+                _timed_stage("speculative revision", speculative_prompt, speculative_usage, caps["speculative revision"])
+            )
+
+        # Stage 2: Reflection Phase
+        try:
+            stages["reflection_analysis"], reflection_elapsed = await _timed_stage(
+                "reflection", build_reflection_prompt(initial_evaluation, source_en, candidate_fil, reference_fil, domain_guidelines, schema), usage, caps["reflection"]
+            )
+        except StageError:
+            if speculative_task is not None:
+                outcome, _, wasted_usage = await _discard_speculation(speculative_task, speculative_usage, speculative_prompt)
+                _record_speculation(domain_guidelines, outcome, wasted_usage=wasted_usage)
+                _merge_usage(usage, wasted_usage)
+            raise
+        except BaseException:
+            if speculative_task is not None:
+                speculative_task.cancel()
+            raise
+        reflection_analysis = stages["reflection_analysis"]
+
+        # Stage 3: Final Evaluation (if revision needed)
+        final_evaluation = None
+        if speculative_task is not None:
+            if reflection_analysis.get("recommendation") == "revise":
+                try:
+                    final_evaluation, revision_elapsed = await speculative_task
+                    # Serially the revision would have started after reflection finished
+                    latency_saved = min(reflection_elapsed, revision_elapsed)
+                    speculation = {"outcome": "committed", "latency_saved_s": round(latency_saved, 3)}
+                    _record_speculation(domain_guidelines, "committed", latency_saved_s=latency_saved)
+                except StageError as e:
+                    print(f"Speculative revision failed, falling back to a regular revision: {e}")
+                    speculation = {"outcome": "failed", "wasted_usage": dict(speculative_usage)}
+                    _record_speculation(domain_guidelines, "failed", wasted_usage=speculative_usage)
+                _merge_usage(usage, speculative_usage)
+            else:
+                # Not needed; its tokens were still billed, so they count towards this result's usage
+                outcome, finished, wasted_usage = await _discard_speculation(speculative_task, speculative_usage, speculative_prompt)
+                speculation = {"outcome": outcome, "finished_before_cancel": finished, "wasted_usage": wasted_usage}
+                _record_speculation(domain_guidelines, outcome, wasted_usage=wasted_usage)
+                _merge_usage(usage, wasted_usage)
+
+        if reflection_analysis.get("recommendation") == "revise":
+            if final_evaluation is None:
+                final_evaluation = await _run_stage(
+                    "revision", build_revision_prompt(initial_evaluation, reflection_analysis, source_en, candidate_fil, reference_fil, domain_guidelines, schema), usage, caps["revision"]
+                )
+            if schema == "compact":
+                final_evaluation = normalize_evaluation(final_evaluation)
+        else:
+            final_evaluation = dict(initial_evaluation)
+            final_evaluation["revision_notes"] = "No revision needed after reflection"
+    except StageError as e:
+        # Retry budget exhausted; return what was already paid for alongside the error
         return {
+            "error": str(e.cause),
+            "failed_stage": e.stage,
+            "attempts": e.attempts,
+            **stages,
+            "usage": usage
+        }
+
+    # Compile complete result
+    reflection_triggered = reflection_analysis.get("recommendation") == "revise"
+    result = {
+        "initial_evaluation": initial_evaluation,
+        **raw_initial,
+        "reflection_analysis": reflection_analysis,
+        "final_evaluation": final_evaluation,
+        "reflection_triggered": reflection_triggered,
+        "pipeline_path": "revision" if reflection_triggered else "reflection",
+        "gate_reason": gate_reason,
+        "usage": usage
+    }
+    if speculation is not None:
+        result["speculation"] = speculation
+    return result
+
+async def evaluate_translations_async(pairs, max_concurrency=100, **options):
+    """
+    Evaluates many pairs concurrently on one event loop. Each pair is a dict with source_en,
+    candidate_fil and optionally reference_fil, domain_guidelines and comet_score. Results keep the
+    input order. Extra keyword options (use_cache, early_exit_policy, ...) apply to every pair.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def evaluate_one(pair):
+        async with semaphore:
+            return await evaluate_translation_with_reflection_async(
+                pair["source_en"],
+                pair["candidate_fil"],
+                pair.get("reference_fil", ""),
+                pair.get("domain_guidelines", ""),
+                comet_score=pair.get("comet_score"),
+                **options
+            )
+
+    return await asyncio.gather(*(evaluate_one(pair) for pair in pairs))
+
+def _listwise_chunks(candidates):
+    # Greedy split by count and by estimated candidate tokens; a single oversized candidate gets its own chunk
+    chunks, chunk, chunk_tokens = [], [], 0
+    for index, candidate in enumerate(candidates):
+        tokens = len(candidate) // 4 + 1
+        if chunk and (len(chunk) >= LISTWISE_MAX_CANDIDATES_PER_CALL or chunk_tokens + tokens > LISTWISE_MAX_CANDIDATE_TOKENS):
+            chunks.append(chunk)
+            chunk, chunk_tokens = [], 0
+        chunk.append(index)
+        chunk_tokens += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def _listwise_cap(caps, stage, count):
+    return min(LISTWISE_MAX_COMPLETION_TOKENS, caps[stage] * count)
+
+async def _run_listwise_chunk(indices, source_en, candidates, reference_fil, domain_guidelines, schema):
+    """
+    Runs initial, reflection and (for flagged candidates only) revision as one request each for a
+    chunk of candidates. Returns per-candidate results keyed by index, the model's ranking of the
+    chunk, and the prompts sent so the caller can estimate savings.
+    """
+    caps = STAGE_MAX_COMPLETION_TOKENS[schema]
+    ids = {index: f"C{index + 1}" for index in indices}
+    chunk_candidates = {ids[index]: candidates[index] for index in indices}
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    prompts = []
+    calls = 0
+
+    prompt = build_listwise_initial_prompt(source_en, chunk_candidates, reference_fil, domain_guidelines, schema)
+    prompts.append(prompt)
+    calls += 1
+    initial = await _run_stage("listwise initial", prompt, usage, _listwise_cap(caps, "initial", len(indices)))
+    initial_evaluations = {
+        candidate_id: normalize_evaluation(evaluation) if schema == "compact" else evaluation
+        for candidate_id, evaluation in (initial.get("evaluations") or {}).items()
+        if candidate_id in chunk_candidates and isinstance(evaluation, dict)
+    }
+    model_ranking = [candidate_id for candidate_id in initial.get("ranking") or [] if candidate_id in initial_evaluations]
+
+    reflections = {}
+    if initial_evaluations:
+        evaluated = {candidate_id: chunk_candidates[candidate_id] for candidate_id in initial_evaluations}
+        prompt = build_listwise_reflection_prompt(initial_evaluations, source_en, evaluated, reference_fil, domain_guidelines, schema)
+        prompts.append(prompt)
+        calls += 1
+        reflection = await _run_stage("listwise reflection", prompt, usage, _listwise_cap(caps, "reflection", len(evaluated)))
+        reflections = {
+            candidate_id: analysis
+            for candidate_id, analysis in (reflection.get("reflections") or {}).items()
+            if candidate_id in initial_evaluations and isinstance(analysis, dict)
+        }
+
+    to_revise = [candidate_id for candidate_id, analysis in reflections.items() if analysis.get("recommendation") == "revise"]
+    revised = {}
+    if to_revise:
+        prompt = build_listwise_revision_prompt(
+            {candidate_id: initial_evaluations[candidate_id] for candidate_id in to_revise},
+            {candidate_id: reflections[candidate_id] for candidate_id in to_revise},
+            source_en,
+            {candidate_id: chunk_candidates[candidate_id] for candidate_id in to_revise},
+            reference_fil,
+            domain_guidelines,
+            schema
+        )
+        prompts.append(prompt)
+        calls += 1
+        revision = await _run_stage("listwise revision", prompt, usage, _listwise_cap(caps, "revision", len(to_revise)))
+        revised = {
+            candidate_id: normalize_evaluation(evaluation) if schema == "compact" else evaluation
+            for candidate_id, evaluation in (revision.get("evaluations") or {}).items()
+            if candidate_id in to_revise and isinstance(evaluation, dict)
+        }
+
+    results = {}
+    for index in indices:
+        candidate_id = ids[index]
+        # A candidate the model skipped at any stage is judged on its own below
+        if candidate_id not in reflections or (candidate_id in to_revise and candidate_id not in revised):
+            continue
+        reflection_triggered = candidate_id in to_revise
+        if reflection_triggered:
+            final_evaluation = revised[candidate_id]
+        else:
+            final_evaluation = dict(initial_evaluations[candidate_id])
+            final_evaluation["revision_notes"] = "No revision needed after reflection"
+        results[index] = {
+            "candidate_id": candidate_id,
+            "candidate_fil": candidates[index],
+            "initial_evaluation": initial_evaluations[candidate_id],
+            "reflection_analysis": reflections[candidate_id],
+            "final_evaluation": final_evaluation,
+            "reflection_triggered": reflection_triggered,
+            "pipeline_path": "revision" if reflection_triggered else "reflection"
+        }
+    return results, model_ranking, usage, calls, prompts
+
+def _estimate_per_candidate_prompt_tokens(result, source_en, reference_fil, domain_guidelines, schema):
+    # Prompt tokens the same candidate would have cost through the per-candidate pipeline (~4 chars per token)
+    candidate_fil = result["candidate_fil"]
+    chars = len(build_initial_prompt(source_en, candidate_fil, reference_fil, domain_guidelines, schema))
+    chars += len(build_reflection_prompt(result["initial_evaluation"], source_en, candidate_fil, reference_fil, domain_guidelines, schema))
+    if result["reflection_triggered"]:
+        chars += len(build_revision_prompt(result["initial_evaluation"], result["reflection_analysis"], source_en, candidate_fil, reference_fil, domain_guidelines, schema))
+    return chars // 4
+
+def _rank_candidates(results, model_rank):
+    def sort_key(index):
+        final_evaluation = results[index].get("final_evaluation")
+        if not isinstance(final_evaluation, dict):
+            return (1, 0, 0, model_rank.get(index, len(results)))
+        return (0, -(final_evaluation.get("score") or 0), -(final_evaluation.get("sum_of_criteria") or 0), model_rank.get(index, len(results)))
+    return sorted(range(len(results)), key=sort_key)
+
+async def evaluate_candidates_with_reflection_async(
+    source_en,
+    candidates,
+    reference_fil="",
+    domain_guidelines="",
+    use_cache=True,
+    schema=None
+):
+    """
+    Evaluates several candidate translations of one source with the reflection loop, one request per
+    stage for each chunk of candidates. Returns per-candidate results in the evaluate_translation
+    schema, a ranking (candidate indices, best first) and the estimated savings over judging each
+    candidate separately.
+    """
+    schema = schema or OUTPUT_SCHEMA
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        inputs = {"source_en": source_en, "candidates": list(candidates), "reference_fil": reference_fil, "domain_guidelines": domain_guidelines}
+        if schema != "full":
+            inputs["schema"] = schema
+        cache_key = make_cache_key(
+            "evaluate_candidates",
+            inputs,
+            JUDGE_MODEL,
+            JUDGE_TEMPERATURE,
+            PROMPT_VERSIONS["evaluate_candidates"]
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+
+    started = time.perf_counter()
+    chunks = _listwise_chunks(candidates)
+    outcomes = await asyncio.gather(
+        *(_run_listwise_chunk(indices, source_en, candidates, reference_fil, domain_guidelines, schema) for indices in chunks),
+        return_exceptions=True
+    )
+
+    results = [None] * len(candidates)
+    model_rank = {}
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    listwise_calls = 0
+    listwise_prompt_chars = 0
+    fallback = []
+    for indices, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, StageError):
+            listwise_calls += STAGE_POSITIONS.get(outcome.stage, 1)
+            for index in indices:
+                results[index] = {"candidate_fil": candidates[index], "error": str(outcome.cause), "failed_stage": outcome.stage}
+            continue
+        if isinstance(outcome, BaseException):
+            raise outcome
+        chunk_results, chunk_ranking, chunk_usage, chunk_calls, prompts = outcome
+        _merge_usage(usage, chunk_usage)
+        listwise_calls += chunk_calls
+        listwise_prompt_chars += sum(len(prompt) for prompt in prompts)
+        for position, candidate_id in enumerate(chunk_ranking):
+            model_rank[int(candidate_id[1:]) - 1] = position
+        for index in indices:
+            if index in chunk_results:
+                results[index] = chunk_results[index]
+            else:
+                fallback.append(index)
+
+    llm_calls = listwise_calls
+    if fallback:
+        print(f"Listwise evaluation skipped {len(fallback)} candidates; judging them separately")
+        fallback_results = await asyncio.gather(*(
+            evaluate_translation_with_reflection_async(source_en, candidates[index], reference_fil, domain_guidelines, use_cache, schema=schema)
+            for index in fallback
+        ))
+        for index, result in zip(fallback, fallback_results):
+            _merge_usage(usage, result.get("usage") or {})
+            llm_calls += count_llm_calls("evaluate_translation", result)
+            results[index] = {"candidate_id": f"C{index + 1}", "candidate_fil": candidates[index], **result, "fallback": True}
+
+    judged = [result for result in results if "error" not in result and not result.get("fallback")]
+    per_candidate_calls = sum(3 if result["reflection_triggered"] else 2 for result in judged)
+    per_candidate_prompt_tokens = sum(
+        _estimate_per_candidate_prompt_tokens(result, source_en, reference_fil, domain_guidelines, schema) for result in judged
+    )
+    result = {
+        "candidates": results,
+        "ranking": _rank_candidates(results, model_rank),
+        "chunks": len(chunks),
+        "usage": usage,
+        "llm_calls": llm_calls,
+        "latency_s": round(time.perf_counter() - started, 3),
+        "savings": {
+            # Covers the candidates judged listwise; fallbacks cost the same either way
+            "per_candidate_llm_calls": per_candidate_calls,
+            "listwise_llm_calls": listwise_calls,
+            "estimated_per_candidate_prompt_tokens": per_candidate_prompt_tokens,
+            "estimated_listwise_prompt_tokens": listwise_prompt_chars // 4,
+            "estimated_prompt_tokens_saved": per_candidate_prompt_tokens - listwise_prompt_chars // 4
+        }
+    }
+    if cache is not None and not any("error" in candidate for candidate in results) and _served_by_primary(usage, ("judge", JUDGE_MODEL)):
+        cache.set(cache_key, "evaluate_candidates", result)
+    return result
+
+# Position of each stage in its pipeline: a result that failed at a stage made this many calls
+STAGE_POSITIONS = {
+    "initial": 1,
+    "cascade initial": 1,
+    "reflection": 2,
+    "reflect_and_revise": 2,
+    "revision": 3,
+    "listwise initial": 1,
+    "listwise reflection": 2,
+    "listwise revision": 3,
+}
+
+def count_llm_calls(tool_name, result):
+    """
+    LLM requests a tool result cost, one per stage attempted and ignoring stage retries.
+    Cache hits and COMET cost none.
+    """
+    if not isinstance(result, dict) or result.get("cache_hit"):
+        return 0
+    if tool_name == "evaluate_translation":
+        cascade = result.get("cascade") or {}
+        # The cheap-tier call comes on top of an escalated pipeline
+        cheap_calls = 1 if cascade.get("escalated") else 0
+        if cascade.get("expensive_cache_hit"):
+            return cheap_calls
+        if "error" in result:
+            return cheap_calls + STAGE_POSITIONS.get(result.get("failed_stage"), 1)
+        return cheap_calls + {"early_exit": 1, "reflection": 2, "revision": 3, "combined": 2, "cascade_cheap": 1}.get(result.get("pipeline_path"), 2)
+    if tool_name in ("evaluate_candidates", "evaluate_document"):
+        return result.get("llm_calls", 0)
+    if tool_name == "evaluate_style":
+        return 1
+    return 0
+
+def evaluate_translation_with_reflection(
+    source_en,
+    candidate_fil,
+    reference_fil="",
+    domain_guidelines="",
+    use_cache=True,
+    comet_score=None,
+    early_exit_policy=None,
+    speculative=None,
+    pipeline_mode=None,
+    schema=None,
+    cascade_policy=None
+):
+    """
+    Performs translation evaluation with reflection loop
+    """
+    return run_on_background_loop(
+        evaluate_translation_with_reflection_async(
+            source_en, candidate_fil, reference_fil, domain_guidelines, use_cache, comet_score, early_exit_policy, speculative, pipeline_mode, schema, cascade_policy
+        )
+    )
+
+def evaluate_candidates_with_reflection(
+    source_en,
+    candidates,
+    reference_fil="",
+    domain_guidelines="",
+    use_cache=True,
+    schema=None
+):
+    """
+    Evaluates several candidate translations of one source with the reflection loop and ranks them
+    """
+    return run_on_background_loop(
+        evaluate_candidates_with_reflection_async(source_en, candidates, reference_fil, domain_guidelines, use_cache, schema)
+    )
+
+def _comet_token_length(model, text: str) -> int:
+    try:
+        return len(model.encoder.tokenizer(text, add_special_tokens=False)["input_ids"])
+    except Exception:
+        # Fall back to a whitespace count if the encoder doesn't expose a tokenizer
+        return len(text.split())
+
+def predict_translation_quality_batch(
+    pairs: list,
+    model_name: str = "Unbabel/wmt20-comet-qe-da",
+    batch_size: int = 16,
+    use_cache: bool = True
+) -> list:
+    """
+    Scores a list of (source_en, candidate_fil) pairs with COMET-QE. Pairs are sorted by token
+    length so each batch holds similarly sized inputs, and results come back in the original order.
+    """
+    if not pairs:
+        return []
+
+    model_name = _comet_backend_model_name(model_name)
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        cache_keys = [_comet_cache_key(source_en, candidate_fil, model_name) for source_en, candidate_fil in pairs]
+        cached = [cache.get(key) for key in cache_keys]
+        missing = [i for i, result in enumerate(cached) if result is None]
+        if missing:
+            scored = predict_translation_quality_batch(
+                [pairs[i] for i in missing], model_name=model_name, batch_size=batch_size, use_cache=False
+            )
+            for i, result in zip(missing, scored):
+                cached[i] = result
+                if result.get("comet_score") is not None:
+                    cache.set(cache_keys[i], "predict_translation_quality", result)
+        return cached
+
+    try:
+        if COMET_WORKER_PROCESSES > 0:
+            # Scored in the worker processes; the forward pass never runs on this thread
+            return get_comet_worker_pool().score(pairs, model_name=model_name, batch_size=batch_size)
+        # Loaded once per process and kept warm by the registry
+        return _score_with_model(get_comet_model(model_name), pairs, model_name, batch_size)
+    except Exception as e:
+        return [{"error": str(e), "comet_score": None} for _ in pairs]
+
+def _score_with_model(model, pairs, model_name, batch_size):
+    """
+    Length-sorted COMET-QE scoring with an already loaded model; also runs inside the worker processes
+    """
+    # Sort by token length to minimise padding inside each batch
+    lengths = [
+        _comet_token_length(model, source_en) + _comet_token_length(model, candidate_fil)
+        for source_en, candidate_fil in pairs
+    ]
+    order = sorted(range(len(pairs)), key=lambda i: lengths[i])
+
+    sorted_pairs = [pairs[i] for i in order]
+    if COMET_SOURCE_EMBEDDING_CACHE and supports_source_cache(model) and source_cache_verified(model, sorted_pairs, model_name, batch_size):
+        # Only the mt side and the estimator head run for sources that were already encoded
+        scores = score_with_source_cache(model, sorted_pairs, model_name, batch_size)
+    else:
+        # Predict quality scores; batches are taken in sorted order so length_batching is not needed
+        model_output = model.predict(
+            [{"src": source_en, "mt": candidate_fil} for source_en, candidate_fil in sorted_pairs],
+            batch_size=batch_size,
+            gpus=0,  # Use gpus=1 if available
+            progress_bar=False,
+            length_batching=False
+        )
+        scores = model_output.scores
+
+    # Restore the caller's order and convert to interpretable metrics
+    results = [None] * len(pairs)
+    for sorted_position, original_index in enumerate(order):
+        score = float(scores[sorted_position])
+        results[original_index] = {
             "comet_score": score,
             "interpretation": interpret_comet_score(score),
             "model": model_name,
             "warnings": [] if score > 0.5 else ["Low quality detected"]
         }
-    except Exception as e:
-        return {"error": str(e), "comet_score": None}
+    return results
+
+def predict_translation_quality(
+    source_en: str, 
+    candidate_fil: str, 
+    model_name: str = "Unbabel/wmt20-comet-qe-da",
+    use_cache: bool = True
+) -> dict:
+    model_name = _comet_backend_model_name(model_name)
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        cache_key = _comet_cache_key(source_en, candidate_fil, model_name)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if COMET_MICRO_BATCHING:
+        try:
+            result = get_comet_batcher().submit(source_en, candidate_fil, model_name).result()
+        except Exception as e:
+            # A failed batch fails every pair in it; callers expect the usual error result, not an exception
+            result = {"error": str(e), "comet_score": None}
+    else:
+        result = predict_translation_quality_batch([(source_en, candidate_fil)], model_name=model_name, batch_size=1, use_cache=False)[0]
+
+    if cache is not None and result.get("comet_score") is not None:
+        cache.set(cache_key, "predict_translation_quality", result)
+    return result
+
+def _comet_backend_model_name(model_name):
+    if COMET_INT8 and not model_name.endswith(INT8_SUFFIX):
+        return model_name + INT8_SUFFIX
+    return model_name
+
+def _comet_cache_key(source_en, candidate_fil, model_name):
+    return make_cache_key(
+        "predict_translation_quality",
+        {"source_en": source_en, "candidate_fil": candidate_fil},
+        model_name,
+        prompt_version=PROMPT_VERSIONS["predict_translation_quality"]
+    )
+
+def get_comet_batcher() -> MicroBatcher:
+    global _comet_batcher
+    with _comet_batcher_lock:
+        if _comet_batcher is None:
+            # The single-pair wrapper already checked the cache before queueing
+            _comet_batcher = MicroBatcher(
+                functools.partial(predict_translation_quality_batch, use_cache=False),
+                max_wait_ms=COMET_MICRO_BATCH_MAX_WAIT_MS,
+                max_batch_size=COMET_MICRO_BATCH_MAX_SIZE,
+                # With worker processes, keep one batch in flight per worker
+                max_in_flight=max(1, COMET_WORKER_PROCESSES)
+            )
+        return _comet_batcher
+
+def get_comet_worker_pool() -> CometWorkerPool:
+    global _comet_worker_pool
+    with _comet_worker_pool_lock:
+        if _comet_worker_pool is None:
+            _comet_worker_pool = CometWorkerPool(
+                _score_with_model,
+                processes=COMET_WORKER_PROCESSES,
+                timeout_s=COMET_WORKER_TIMEOUT_SECONDS
+            )
+        return _comet_worker_pool
+
+def comet_worker_stats() -> dict:
+    if _comet_worker_pool is None:
+        return {}
+    return _comet_worker_pool.stats()
+
+def comet_batcher_stats() -> dict:
+    if _comet_batcher is None:
+        return {}
+    return _comet_batcher.stats()
     
 def interpret_comet_score(score: float) -> str:
     if score >= 0.8:
@@ -223,8 +1506,29 @@ def interpret_comet_score(score: float) -> str:
 def style_checker(
     source_en: str,
     candidate_fil: str,
-    style_guidelines: str = "The translation should maintain a formal, technical tone."
+    style_guidelines: str = "The translation should maintain a formal, technical tone.",
+    use_cache: bool = True
 ) -> dict:
+    cache = get_judge_cache() if use_cache else None
+    if cache is not None:
+        cache_key = make_cache_key(
+            "style_checker",
+            {"source_en": source_en, "candidate_fil": candidate_fil, "style_guidelines": style_guidelines},
+            JUDGE_MODEL,
+            STYLE_TEMPERATURE,
+            PROMPT_VERSIONS["style_checker"]
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+
+    served_by = []
+    evaluation = _run_style_checker(source_en, candidate_fil, style_guidelines, served_by)
+    if cache is not None and "error" not in evaluation and served_by == [primary_target("judge", JUDGE_MODEL)]:
+        cache.set(cache_key, "style_checker", evaluation)
+    return evaluation
+
+def _run_style_checker(source_en, candidate_fil, style_guidelines, served_by=None):
 
     prompt = f"""
     Analyze the style of the SOURCE (English) and TRANSLATION (Filipino) texts below.
@@ -252,107 +1556,21 @@ def style_checker(
     """
     
     try:
-        client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-        response = client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,  # Lower for more deterministic output
-            response_format={"type": "json_object"}  # Force JSON output
+        response = complete(
+            "judge",
+            [{"role": "user", "content": prompt}],
+            model=JUDGE_MODEL,
+            temperature=STYLE_TEMPERATURE,  # Lower for more deterministic output
+            response_format={"type": "json_object"},  # Force JSON output
+            served_by=served_by
         )
         
         # Parse LLM response
         evaluation = json.loads(response.choices[0].message.content)
-        evaluation["manual"] = f"""
-This manual outlines the key principles and specific criteria for evaluating the quality of English to Filipino translations. It emphasizes understanding the translator's purpose, the nature of the source text, and the needs of the target audience, going beyond mere word-for-word equivalence.
-I. General Translation Principles and Objectives
-1. Understanding the Translator's Role and Intent:
-    ◦ Translating is a demanding job that requires unusual training in both languages and in solving common problems of transferring ideas, knowledge, and wordplay from the original to the target language.
-    ◦ The primary goal of translation is the transfer of meaning.
-    ◦ The translator must decide their purpose: whether to imitate (panggagaya) the original by striving for faithfulness in language, form, and tone, or to reproduce (muling-pagbuo) it by adapting the meaning to the presumed interests and needs of the target society and time, offering more freedom and flexibility.
-    ◦ A translation should ultimately enrich the language and knowledge of the target language, or serve as a bridge to provide an important experience of another land and time.
-2. Degree of Fidelity vs. Freedom:
-    ◦ While often preached as needing to be "faithful" (matapat), it is impossible to be "one hundred percent faithful" because no two languages are identical.
-    ◦ John Dryden's "lunggating Dryden" (Dryden's aspiration) aimed for the translated language to be as powerful and beautiful as the original, suggesting the translated language should speak as if the original author were born into that language and time.
-    ◦ Cicero's "imperyalistang pribilehiyo" (imperialist privilege) allowed translators from a "superior" culture to freely choose translation methods without considering what might be lost from the original.
-    ◦ Translators always balance linguistic limitations with the complexities of the original and their self-imposed duties.
-    ◦ Paciano Mercado Rizal's advice (1886): Translation should align with the words when understandable, and be free when obscure, but never stray from the meaning.
-3. Accuracy (Eksaktitud) and Appropriateness (Angkop):
-    ◦ Accuracy is paramount, meaning the translation is "correct":
-        ▪ Correct reading of the text.
-        ▪ Clear interpretation.
-        ▪ Effective revitalisation of the original.
-    ◦ Appropriateness means the translation is suitable for the context, language of the time, place, community, and target sector. For instance, "Magyosi Kadiri!" was deemed inappropriate in Visayas as "ka dirí" means "here" in Cebuano, resulting in a reversed meaning.
-    ◦ Honorifics such as "po", and "opo" are used to show respect to the elderly.
-II. Criteria for Literary Translation
-Literary translation involves playing with language and requires the translator to capture the "illocutionary power" of the original.
-1. Capturing Literary Devices and Wordplay:
-    ◦ Recognise that creative writing is a "violence on language" (Roman Jakobson), meaning authors creatively alter common language use.
-    ◦ Identify and find equivalents for figures of speech (tayutay) and rhetorical devices (kasangkapang panretorika).
-    ◦ Rhythm and Meter: Assess if the translation captures the musicality and beat of the original. For poetry, this includes:
-        ▪ Tugma (rhyme): Repetition of sounds at the end of lines.
-        ▪ Súkat (meter): Repetition of the number of syllables per line.
-        ▪ Aliterasyon (alliteration): Repetition of consonants.
-        ▪ Asonansiya (assonance): Repetition of vowels.
-        ▪ Dramatic repetition: Repeating words or phrases to connect emotions or ideas, as "adiós" in Rizal's poem.
-    ◦ Tone (Himig): Accurately convey the author's intended tone (e.g., joyous, sarcastic, contemplative).
-        ▪ For example, Rizal's sarcastic tone in the 13th stanza of "Último adiós" regarding faith and God was effectively conveyed by Bonifacio and Tolentino.
-    ◦ Word Choice and Nuance: Select words that convey the precise emotional and literary quality of the original.
-2. Researching Cultural and Historical Context:
-    ◦ Allusions (Alusyon): Identify literary, historical, or cultural allusions embedded in the text.
-        ▪ Translators must research the "sources" (pinagkunan) of the original to ensure accurate translation.
-        ▪ Example: Rizal's "nuestro perdido Edén" (our lost Eden) alludes to Espronceda and the Biblical paradise, requiring the translator to understand these layers of meaning.
-    ◦ Author's Background: Understand the author's personal and public background, as it shapes the text.
-        ▪ Example: Rizal's "tersa frente" (smooth forehead) evolved in meaning from "A la Juventud Filipina" to "Último adiós," reflecting his evolving patriotic sentiment.
-    ◦ Cultural Content: Be aware that each language is a product of its geography, history, ideology, and experience, making 100% literal translation impossible.
-        ▪ Translators may need to introduce foreign concepts (e.g., "winter," "snow," "ice") if appropriate, thus enriching the TL.
-        ▪ Translators may choose to borrow foreign terms (e.g., "sipres, lawrel, liryo") or find conceptual equivalents based on the cultural context.
-        ▪ Be mindful of substitutions that alter ideological meaning: e.g., replacing "Dios" with "Bathala" by Bonifacio and Tolentino to align with Katipunero ideals.
-3. Handling "Halaw" (Abbreviation/Adaptation) vs. Full Translation:
-    ◦ "Halaw" and "pinagaang edisyon" (lightened editions) are problematic when presented as full translations. They often sacrifice literary quality and critical details for brevity or commercial gain.
-    ◦ True "halaw" (adaptation) can be educationally valuable if its purpose is to simplify for quick learning and to introduce students to literature, potentially leading them to the original.
-    ◦ A good "halaw" should still convey the main literary qualities of the original, such as plot and character development in a novel.
-    ◦ "Hango" (adaptation) involves reshaping the original into a modern or more appropriate form for the target audience (e.g., comic book, film). This is distinct from "halaw" as it is not simply an abridgement but a creative re-creation.
-4. Continuous Improvement:
-    ◦ No translation is permanent ("walang panghabàng-panahong salin").
-    ◦ Translators should continually review and revise their work, even after publication, to incorporate new insights, better word choices, or corrected interpretations.
-III. Criteria for Technical Translation
-Technical translation is primarily utilitarian and aims to effectively convey specialised information for practical use.
-1. Clarity and Readability:
-    ◦ The primary challenge is to ensure all relevant information is conveyed easily, properly, and effectively for the target readers.
-    ◦ Write for the target reader and write clearly.
-    ◦ Avoid unnecessary repetition.
-    ◦ Avoid unnecessary adjectives and modifiers.
-    ◦ Use simple words and simple expressions.
-    ◦ Use an active voice and affirmative tone.
-    ◦ Cite sources, expert opinions, and factual reports/test results.
-    ◦ Ensure clean spelling and punctuation.
-2. Subject Matter Expertise:
-    ◦ The translator must not be ignorant of the subject.
-    ◦ They need sufficient knowledge of the topic to translate accurately, and be adept at research to gain additional information if needed.
-    ◦ They should be a good researcher, having read related works and studies, and possess a good understanding of general scientific and technological principles.
-3. Handling Terminology (Pagtutumbas, Panghihiram, Paglikha):
-    ◦ Prioritise meaning over literal word-for-word translation. All words can have multiple meanings depending on context (e.g., "saves" can mean "nagliligtas" or "nagtitipid").
-    ◦ Systematic Approach to Vocabulary: Follow KWF's recommended steps for finding equivalents:
-        1. Pagtutumbas (Equivalence):
-            • First, search for equivalents within the current corpus of the Filipino language. This deepens the translator's knowledge of their own language and avoids excessive unnecessary borrowing.
-            • Second, look for equivalents from other indigenous languages of the Philippines. Examples include "katarúngan" (justice) from Cebuano "taróng" and "lungsód" (city) from Boholano.
-            • Be aware that true, complete equivalents are rare. Explanations, phrases, or new creations might be necessary.
-        2. Panghihiram (Borrowing):
-            • Spanish is the first language for borrowing due to historical influence. Be cautious of "siyokoy" words (incorrect forms of borrowed words).
-            • English is the second language for borrowing.
-            • Borrowing without change: For proper nouns (people, places, titles), scientific and technical terms (e.g., carbon dioxide, jus sanguinis, zeitgeist), and words difficult to immediately respell without causing confusion (e.g., cauliflower, pizza).
-            • Respell if appropriate: For words that integrate easily into Filipino orthography (e.g., "istambay," "iskedyul," "pulis"). However, avoid respelling if it makes the word awkward, harder to read, destroys cultural/religious/political meaning, or creates confusion with existing Filipino words.
-            • KWF now advises retaining the original scientific and technical terms (English, Spanish, German, Latin) in writing to ease teaching and learning in science and technology.
-        3. Paglikha (Creation/Neologism): A valuable method for enriching the TL's vocabulary.
-            • Bágong-pagbuô (new construction/neologism): Creating new words from existing Filipino morphemes or concepts (e.g., "banyuhay" for metamorphosis, "takdang-aralin" for assignment).
-            • Hirám-sálin (calquing or loan translation): Literal translation of foreign idioms or compounds (e.g., "daambakal" for railway).
-            • Bágong-húlog (new meaning/revitalisation): Giving a new, often technical, meaning to an old native word (e.g., "agham" for science, "kawani" for employee, "rabáw" for surface).
-    ◦ Consistency (Konsistensi): Maintain consistency in terminology and spelling within the translation. This is crucial for accuracy and clarity in technical texts.
-4. Objectivity vs. Subjectivity:
-    ◦ Technical texts should generally be objective and factual.
-    ◦ However, if the purpose is to popularise or persuade, the translation may adopt a subjective tone or point of view (e.g., news articles, columns). In such cases, the translator's motive becomes important.
-    ◦ Even when subjective, the translation should appear free from distortion (bending, exaggeration, or alteration) to maintain credibility, especially if used as evidence.
-"""
+        # Only the manual sections relevant to this pair, not the whole manual
+        sections = retrieve_manual_sections(source_en, candidate_fil, style_guidelines)
+        evaluation["manual_sections"] = [section["id"] for section in sections]
+        evaluation["manual"] = format_manual_sections(sections)
         return evaluation
     
     except Exception as e:
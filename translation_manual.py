@@ -0,0 +1,206 @@
+import math
+import re
+import threading
+from collections import Counter
+
+# Retrieval over the judging manual. Instead of pasting all of it into every prompt, the manual is
+# split into its numbered subsections and a small BM25 index picks the ones relevant to a pair.
+MANUAL_TOP_K = 3
+# Sections always sent regardless of the query (Accuracy and Appropriateness applies to every pair)
+MANUAL_ALWAYS_INCLUDE = ["I.3"]
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+MANUAL_TITLE = "Manual/Criteria for Judging English to Filipino Translations"
+
+TRANSLATION_MANUAL = """
+This manual outlines the key principles and specific criteria for evaluating the quality of English to Filipino translations. It emphasizes understanding the translator's purpose, the nature of the source text, and the needs of the target audience, going beyond mere word-for-word equivalence.
+I. General Translation Principles and Objectives
+1. Understanding the Translator's Role and Intent:
+    ◦ Translating is a demanding job that requires unusual training in both languages and in solving common problems of transferring ideas, knowledge, and wordplay from the original to the target language.
+    ◦ The primary goal of translation is the transfer of meaning.
+    ◦ The translator must decide their purpose: whether to imitate (panggagaya) the original by striving for faithfulness in language, form, and tone, or to reproduce (muling-pagbuo) it by adapting the meaning to the presumed interests and needs of the target society and time, offering more freedom and flexibility.
+    ◦ A translation should ultimately enrich the language and knowledge of the target language, or serve as a bridge to provide an important experience of another land and time.
+2. Degree of Fidelity vs. Freedom:
+    ◦ While often preached as needing to be "faithful" (matapat), it is impossible to be "one hundred percent faithful" because no two languages are identical.
+    ◦ John Dryden's "lunggating Dryden" (Dryden's aspiration) aimed for the translated language to be as powerful and beautiful as the original, suggesting the translated language should speak as if the original author were born into that language and time.
+    ◦ Cicero's "imperyalistang pribilehiyo" (imperialist privilege) allowed translators from a "superior" culture to freely choose translation methods without considering what might be lost from the original.
+    ◦ Translators always balance linguistic limitations with the complexities of the original and their self-imposed duties.
+    ◦ Paciano Mercado Rizal's advice (1886): Translation should align with the words when understandable, and be free when obscure, but never stray from the meaning.
+3. Accuracy (Eksaktitud) and Appropriateness (Angkop):
+    ◦ Accuracy is paramount, meaning the translation is "correct":
+        ▪ Correct reading of the text.
+        ▪ Clear interpretation.
+        ▪ Effective revitalisation of the original.
+    ◦ Appropriateness means the translation is suitable for the context, language of the time, place, community, and target sector. For instance, "Magyosi Kadiri!" was deemed inappropriate in Visayas as "ka dirí" means "here" in Cebuano, resulting in a reversed meaning.
+    ◦ Honorifics such as "po", and "opo" are used to show respect to the elderly.
+II. Criteria for Literary Translation
+Literary translation involves playing with language and requires the translator to capture the "illocutionary power" of the original.
+1. Capturing Literary Devices and Wordplay:
+    ◦ Recognise that creative writing is a "violence on language" (Roman Jakobson), meaning authors creatively alter common language use.
+    ◦ Identify and find equivalents for figures of speech (tayutay) and rhetorical devices (kasangkapang panretorika).
+    ◦ Rhythm and Meter: Assess if the translation captures the musicality and beat of the original. For poetry, this includes:
+        ▪ Tugma (rhyme): Repetition of sounds at the end of lines.
+        ▪ Súkat (meter): Repetition of the number of syllables per line.
+        ▪ Aliterasyon (alliteration): Repetition of consonants.
+        ▪ Asonansiya (assonance): Repetition of vowels.
+        ▪ Dramatic repetition: Repeating words or phrases to connect emotions or ideas, as "adiós" in Rizal's poem.
+    ◦ Tone (Himig): Accurately convey the author's intended tone (e.g., joyous, sarcastic, contemplative).
+        ▪ For example, Rizal's sarcastic tone in the 13th stanza of "Último adiós" regarding faith and God was effectively conveyed by Bonifacio and Tolentino.
+    ◦ Word Choice and Nuance: Select words that convey the precise emotional and literary quality of the original.
+2. Researching Cultural and Historical Context:
+    ◦ Allusions (Alusyon): Identify literary, historical, or cultural allusions embedded in the text.
+        ▪ Translators must research the "sources" (pinagkunan) of the original to ensure accurate translation.
+        ▪ Example: Rizal's "nuestro perdido Edén" (our lost Eden) alludes to Espronceda and the Biblical paradise, requiring the translator to understand these layers of meaning.
+    ◦ Author's Background: Understand the author's personal and public background, as it shapes the text.
+        ▪ Example: Rizal's "tersa frente" (smooth forehead) evolved in meaning from "A la Juventud Filipina" to "Último adiós," reflecting his evolving patriotic sentiment.
+    ◦ Cultural Content: Be aware that each language is a product of its geography, history, ideology, and experience, making 100% literal translation impossible.
+        ▪ Translators may need to introduce foreign concepts (e.g., "winter," "snow," "ice") if appropriate, thus enriching the TL.
+        ▪ Translators may choose to borrow foreign terms (e.g., "sipres, lawrel, liryo") or find conceptual equivalents based on the cultural context.
+        ▪ Be mindful of substitutions that alter ideological meaning: e.g., replacing "Dios" with "Bathala" by Bonifacio and Tolentino to align with Katipunero ideals.
+3. Handling "Halaw" (Abbreviation/Adaptation) vs. Full Translation:
+    ◦ "Halaw" and "pinagaang edisyon" (lightened editions) are problematic when presented as full translations. They often sacrifice literary quality and critical details for brevity or commercial gain.
+    ◦ True "halaw" (adaptation) can be educationally valuable if its purpose is to simplify for quick learning and to introduce students to literature, potentially leading them to the original.
+    ◦ A good "halaw" should still convey the main literary qualities of the original, such as plot and character development in a novel.
+    ◦ "Hango" (adaptation) involves reshaping the original into a modern or more appropriate form for the target audience (e.g., comic book, film). This is distinct from "halaw" as it is not simply an abridgement but a creative re-creation.
+4. Continuous Improvement:
+    ◦ No translation is permanent ("walang panghabàng-panahong salin").
+    ◦ Translators should continually review and revise their work, even after publication, to incorporate new insights, better word choices, or corrected interpretations.
+III. Criteria for Technical Translation
+Technical translation is primarily utilitarian and aims to effectively convey specialised information for practical use.
+1. Clarity and Readability:
+    ◦ The primary challenge is to ensure all relevant information is conveyed easily, properly, and effectively for the target readers.
+    ◦ Write for the target reader and write clearly.
+    ◦ Avoid unnecessary repetition.
+    ◦ Avoid unnecessary adjectives and modifiers.
+    ◦ Use simple words and simple expressions.
+    ◦ Use an active voice and affirmative tone.
+    ◦ Cite sources, expert opinions, and factual reports/test results.
+    ◦ Ensure clean spelling and punctuation.
+2. Subject Matter Expertise:
+    ◦ The translator must not be ignorant of the subject.
+    ◦ They need sufficient knowledge of the topic to translate accurately, and be adept at research to gain additional information if needed.
+    ◦ They should be a good researcher, having read related works and studies, and possess a good understanding of general scientific and technological principles.
+3. Handling Terminology (Pagtutumbas, Panghihiram, Paglikha):
+    ◦ Prioritise meaning over literal word-for-word translation. All words can have multiple meanings depending on context (e.g., "saves" can mean "nagliligtas" or "nagtitipid").
+    ◦ Systematic Approach to Vocabulary: Follow KWF's recommended steps for finding equivalents:
+        1. Pagtutumbas (Equivalence):
+            • First, search for equivalents within the current corpus of the Filipino language. This deepens the translator's knowledge of their own language and avoids excessive unnecessary borrowing.
+            • Second, look for equivalents from other indigenous languages of the Philippines. Examples include "katarúngan" (justice) from Cebuano "taróng" and "lungsód" (city) from Boholano.
+            • Be aware that true, complete equivalents are rare. Explanations, phrases, or new creations might be necessary.
+        2. Panghihiram (Borrowing):
+            • Spanish is the first language for borrowing due to historical influence. Be cautious of "siyokoy" words (incorrect forms of borrowed words).
+            • English is the second language for borrowing.
+            • Borrowing without change: For proper nouns (people, places, titles), scientific and technical terms (e.g., carbon dioxide, jus sanguinis, zeitgeist), and words difficult to immediately respell without causing confusion (e.g., cauliflower, pizza).
+            • Respell if appropriate: For words that integrate easily into Filipino orthography (e.g., "istambay," "iskedyul," "pulis"). However, avoid respelling if it makes the word awkward, harder to read, destroys cultural/religious/political meaning, or creates confusion with existing Filipino words.
+            • KWF now advises retaining the original scientific and technical terms (English, Spanish, German, Latin) in writing to ease teaching and learning in science and technology.
+        3. Paglikha (Creation/Neologism): A valuable method for enriching the TL's vocabulary.
+            • Bágong-pagbuô (new construction/neologism): Creating new words from existing Filipino morphemes or concepts (e.g., "banyuhay" for metamorphosis, "takdang-aralin" for assignment).
+            • Hirám-sálin (calquing or loan translation): Literal translation of foreign idioms or compounds (e.g., "daambakal" for railway).
+            • Bágong-húlog (new meaning/revitalisation): Giving a new, often technical, meaning to an old native word (e.g., "agham" for science, "kawani" for employee, "rabáw" for surface).
+    ◦ Consistency (Konsistensi): Maintain consistency in terminology and spelling within the translation. This is crucial for accuracy and clarity in technical texts.
+4. Objectivity vs. Subjectivity:
+    ◦ Technical texts should generally be objective and factual.
+    ◦ However, if the purpose is to popularise or persuade, the translation may adopt a subjective tone or point of view (e.g., news articles, columns). In such cases, the translator's motive becomes important.
+    ◦ Even when subjective, the translation should appear free from distortion (bending, exaggeration, or alteration) to maintain credibility, especially if used as evidence.
+"""
+
+# Common English and Filipino function words carry no signal for picking a section
+_STOPWORDS = set("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+ang ng nang sa mga na at ay si ni kay ko mo ka ako ikaw siya kami tayo kayo sila ito iyan iyon po
+""".split())
+_PART_PATTERN = re.compile(r"^(I|II|III|IV|V|VI|VII|VIII|IX|X)\. ")
+_SUBSECTION_PATTERN = re.compile(r"^(\d+)\. (.+?):?$")
+
+
+def tokenize(text: str) -> list:
+    return [token for token in re.findall(r"\w+", text.lower()) if len(token) > 1 and token not in _STOPWORDS]
+
+
+def split_manual(manual: str = TRANSLATION_MANUAL) -> list:
+    """
+    Splits the manual into its numbered subsections, e.g. "III.3" for Handling Terminology.
+    Each section keeps its part heading and intro so it still reads on its own.
+    """
+    sections = []
+    part_id = part_heading = None
+    part_intro = []
+    for line in manual.strip().splitlines():
+        part_match = _PART_PATTERN.match(line)
+        subsection_match = _SUBSECTION_PATTERN.match(line)
+        if part_match:
+            part_id, part_heading, part_intro = part_match.group(1), line, []
+        elif subsection_match and part_id:
+            sections.append({
+                "id": f"{part_id}.{subsection_match.group(1)}",
+                "title": f"{part_heading} > {line.rstrip(':')}",
+                "lines": [part_heading, *part_intro, line],
+            })
+        elif sections and sections[-1]["id"].startswith(f"{part_id}."):
+            sections[-1]["lines"].append(line)
+        elif part_id:
+            part_intro.append(line)
+    return [{"id": s["id"], "title": s["title"], "text": "\n".join(s["lines"])} for s in sections]
+
+
+class ManualIndex:
+    def __init__(self, sections: list, k1: float = BM25_K1, b: float = BM25_B):
+        self.sections = sections
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(tokenize(section["text"])) for section in sections]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if sections else 0.0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        n = len(sections)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query: str) -> list:
+        query_terms = set(tokenize(query))
+        results = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in query_terms & counts.keys():
+                tf = counts[term]
+                score += self._idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / self._avg_length))
+            results.append(score)
+        return results
+
+    def search(self, query: str, k: int = MANUAL_TOP_K, always_include=None) -> list:
+        """
+        Top-k matching sections plus the always-included ones, in manual order. When nothing in the
+        query matches, the first k sections (the general principles) are used.
+        """
+        scores = self.scores(query)
+        ranked = sorted(range(len(self.sections)), key=lambda i: (-scores[i], i))
+        chosen = {i for i in ranked[:k] if scores[i] > 0} or set(range(min(k, len(self.sections))))
+        for section_id in always_include if always_include is not None else MANUAL_ALWAYS_INCLUDE:
+            chosen.update(i for i, section in enumerate(self.sections) if section["id"] == section_id)
+        return [{**self.sections[i], "score": round(scores[i], 3)} for i in sorted(chosen)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_manual_index() -> ManualIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ManualIndex(split_manual())
+        return _index
+
+
+def retrieve_manual_sections(*texts, k: int = None) -> list:
+    """
+    Sections relevant to the given texts (source, candidate, domain guidelines, ...). Each item has
+    id, title, text and its BM25 score; record the ids to see what a judge call was shown.
+    """
+    query = "\n".join(text for text in texts if text)
+    return get_manual_index().search(query, MANUAL_TOP_K if k is None else k)
+
+
+def format_manual_sections(sections: list) -> str:
+    body = "\n\n".join(f"[{section['id']}]\n{section['text']}" for section in sections)
+    return f"# {MANUAL_TITLE} (relevant sections)\n{body}"